@@ -1,9 +1,11 @@
 import asyncio
+import logging
 import os
 import signal
 import sys
 from typing import Optional
 import discord
+import orjson
 from discord_client import DiscordSelfBot
 from command_handler import get_command_handler
 from token_manager import TokenManager
@@ -11,6 +13,17 @@ from logger import get_logger
 from session_manager import get_session_manager
 from json_manager import JSONManager
 
+# Fixed WebSocket replies, serialized once at import and sent as-is
+_WS_NO_TOKEN = orjson.dumps({"type": "error", "message": "No token provided"}).decode('utf-8')
+_WS_INVALID_TOKEN_FORMAT = orjson.dumps({"type": "error", "message": "Invalid token format"}).decode('utf-8')
+_WS_BOT_STOPPED = orjson.dumps({"type": "bot_stopped", "message": "Bot stopped"}).decode('utf-8')
+_WS_BOT_RESTARTED = orjson.dumps({"type": "bot_restarted", "message": "Bot restarted"}).decode('utf-8')
+_WS_NO_RESTART_TOKEN = orjson.dumps({"type": "error", "message": "No token provided for restart"}).decode('utf-8')
+_WS_SAVE_TOKEN_FAILED = orjson.dumps({"type": "error", "message": "Failed to save token"}).decode('utf-8')
+_WS_INVALID_TOKEN = orjson.dumps({"type": "error", "message": "Invalid token"}).decode('utf-8')
+_WS_NO_TOKEN_NAME = orjson.dumps({"type": "error", "message": "No token name provided"}).decode('utf-8')
+_WS_INTERNAL_ERROR = orjson.dumps({"type": "error", "message": "Internal server error"}).decode('utf-8')
+
 class BotProcess:
     def __init__(self):
         self.bot: Optional[DiscordSelfBot] = None
@@ -21,6 +34,19 @@ class BotProcess:
         self.command_handler = get_command_handler()
         self.running = False
         
+        # WebSocket message type -> handler
+        self._ws_handlers = {
+            "start_bot": self._ws_start_bot,
+            "stop_bot": self._ws_stop_bot,
+            "restart_bot": self._ws_restart_bot,
+            "get_status": self._ws_get_status,
+            "get_commands": self._ws_get_commands,
+            "save_token": self._ws_save_token,
+            "load_token": self._ws_load_token,
+            "list_tokens": self._ws_list_tokens,
+            "delete_token": self._ws_delete_token
+        }
+        
         # Don't setup signal handlers here - let the main app handle signals
         # through the lifespan manager to avoid conflicts
     
@@ -52,6 +78,10 @@ class BotProcess:
             # Add command handler to bot
             @self.bot.event
             async def on_message(message):
+                # Skip non-command chatter before creating a handler coroutine
+                if not message.content.startswith(self.command_handler.prefix):
+                    return
+                
                 # Don't respond to own messages
                 if message.author == self.bot.user:
                     return
@@ -84,12 +114,17 @@ class BotProcess:
             self.logger.info("Stopping Discord bot...")
             self.running = False
             
-            # Save command statistics
-            await self.command_handler.save_command_stats()
+            # Save command statistics and close the connection concurrently
+            results = await asyncio.gather(
+                self.command_handler.save_command_stats(),
+                self.bot.close_bot() if self.bot else asyncio.sleep(0),
+                return_exceptions=True
+            )
+            self.bot = None
             
-            if self.bot:
-                await self.bot.close()
-                self.bot = None
+            for step, result in zip(("save command stats", "close bot"), results):
+                if isinstance(result, Exception):
+                    self.logger.error(f"Failed to {step} during shutdown: {result}")
             
             self.logger.info("Bot stopped successfully")
             
@@ -132,147 +167,144 @@ class BotProcess:
         try:
             self.logger.info("Running maintenance tasks...")
             
-            # Clean up old logs
-            from logger import cleanup_old_logs
-            cleanup_old_logs()
+            # Clean up old logs off the event loop
+            await asyncio.to_thread(self.logger.cleanup_old_logs)
             
-            # Clean up expired sessions
-            await self.session_manager.cleanup_expired_sessions()
+            # Clean up expired sessions and save command statistics concurrently
+            results = await asyncio.gather(
+                self.session_manager.cleanup_expired_sessions(),
+                self.command_handler.save_command_stats(),
+                return_exceptions=True
+            )
             
-            # Save command statistics
-            await self.command_handler.save_command_stats()
+            for step, result in zip(("clean up sessions", "save command stats"), results):
+                if isinstance(result, Exception):
+                    self.logger.error(f"Failed to {step} during maintenance: {result}")
             
             self.logger.info("Maintenance tasks completed")
             
         except Exception as e:
             self.logger.error(f"Error during maintenance: {e}", exc_info=True)
     
+    async def _maintenance_loop(self, interval: int = 3600):
+        """Run maintenance tasks periodically"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.run_maintenance()
+    
+    def _flush_outbox(self, session_id: str, outbox: list):
+        """Send queued replies to the session, each as its own frame"""
+        for payload in outbox:
+            try:
+                self.session_manager.send_to_session(session_id, payload)
+            except Exception as e:
+                self.logger.error(f"Failed to send reply to session {session_id}: {e}")
+        outbox.clear()
+    
     async def handle_websocket_message(self, message: dict, session_id: str):
         """Handle WebSocket messages from web interface"""
+        # Replies are collected here and sent once handling is done
+        outbox = []
+        
         try:
             message_type = message.get("type")
+            handler = self._ws_handlers.get(message_type)
             
-            if message_type == "start_bot":
-                token = message.get("token")
-                if not token:
-                    await self.session_manager.send_to_session(
-                        session_id, {"type": "error", "message": "No token provided"}
-                    )
-                    return
-                
-                # Validate token format
-                if not self.token_manager.validate_token_format(token):
-                    await self.session_manager.send_to_session(
-                        session_id, {"type": "error", "message": "Invalid token format"}
-                    )
-                    return
-                
-                # Start bot
-                success, message = await self.start_bot(token, session_id)
-                if success:
-                    # The 'discord_ready' event will be sent by the discord_client, 
-                    # so we don't need to send a 'bot_started' message here.
-                    pass
-                else:
-                    await self.session_manager.send_to_session(
-                        session_id, {"type": "error", "message": message}
-                    )
-            
-            elif message_type == "stop_bot":
-                await self.stop_bot()
-                await self.session_manager.send_to_session(
-                    session_id, {"type": "bot_stopped", "message": "Bot stopped"}
-                )
-            
-            elif message_type == "restart_bot":
-                token = message.get("token")
-                if token:
-                    await self.restart_bot(token, session_id)
-                    await self.session_manager.send_to_session(
-                        session_id, {"type": "bot_restarted", "message": "Bot restarted"}
-                    )
-                else:
-                    await self.session_manager.send_to_session(
-                        session_id, {"type": "error", "message": "No token provided for restart"}
-                    )
-            
-            elif message_type == "get_status":
-                status = await self.get_bot_status()
-                await self.session_manager.send_to_session(
-                    session_id, {"type": "bot_status", "data": status}
-                )
-            
-            elif message_type == "get_commands":
-                commands = await self.command_handler.get_command_list()
-                await self.session_manager.send_to_session(
-                    session_id, {"type": "commands_list", "data": commands}
-                )
-            
-            elif message_type == "save_token":
-                token = message.get("token")
-                name = message.get("name", "default")
-                
-                if token and self.token_manager.validate_token_format(token):
-                    success = await self.token_manager.store_token(name, token)
-                    if success:
-                        await self.session_manager.send_to_session(
-                            session_id, {"type": "token_saved", "message": f"Token '{name}' saved"}
-                        )
-                    else:
-                        await self.session_manager.send_to_session(
-                            session_id, {"type": "error", "message": "Failed to save token"}
-                        )
-                else:
-                    await self.session_manager.send_to_session(
-                        session_id, {"type": "error", "message": "Invalid token"}
-                    )
-            
-            elif message_type == "load_token":
-                name = message.get("name", "default")
-                token = await self.token_manager.load_token(name)
-                
-                if token:
-                    await self.session_manager.send_to_session(
-                        session_id, {"type": "token_loaded", "data": {"name": name, "token": token}}
-                    )
-                else:
-                    await self.session_manager.send_to_session(
-                        session_id, {"type": "error", "message": f"Token '{name}' not found"}
-                    )
-            
-            elif message_type == "list_tokens":
-                tokens = await self.token_manager.list_tokens()
-                await self.session_manager.send_to_session(
-                    session_id, {"type": "tokens_list", "data": tokens}
-                )
-            
-            elif message_type == "delete_token":
-                name = message.get("name")
-                if name:
-                    success = await self.token_manager.delete_token(name)
-                    if success:
-                        await self.session_manager.send_to_session(
-                            session_id, {"type": "token_deleted", "message": f"Token '{name}' deleted"}
-                        )
-                    else:
-                        await self.session_manager.send_to_session(
-                            session_id, {"type": "error", "message": f"Failed to delete token '{name}'"}
-                        )
-                else:
-                    await self.session_manager.send_to_session(
-                        session_id, {"type": "error", "message": "No token name provided"}
-                    )
-            
+            if handler is None:
+                outbox.append({"type": "error", "message": f"Unknown message type: {message_type}"})
             else:
-                await self.session_manager.send_to_session(
-                    session_id, {"type": "error", "message": f"Unknown message type: {message_type}"}
-                )
+                await handler(message, session_id, outbox)
         
         except Exception as e:
             self.logger.error(f"Error handling WebSocket message: {e}", exc_info=True)
-            await self.session_manager.send_to_session(
-                session_id, {"type": "error", "message": "Internal server error"}
-            )
+            outbox.append(_WS_INTERNAL_ERROR)
+        finally:
+            self._flush_outbox(session_id, outbox)
+    
+    async def _ws_start_bot(self, message: dict, session_id: str, outbox: list):
+        """Handle a start_bot WebSocket message"""
+        token = message.get("token")
+        if not token:
+            outbox.append(_WS_NO_TOKEN)
+            return
+        
+        # Validate token format
+        if not self.token_manager.validate_token_format(token):
+            outbox.append(_WS_INVALID_TOKEN_FORMAT)
+            return
+        
+        # Start bot
+        success, result_message = await self.start_bot(token, session_id)
+        if not success:
+            outbox.append({"type": "error", "message": result_message})
+        
+        # On success the 'discord_ready' event will be sent by the discord_client,
+        # so we don't need to send a 'bot_started' message here.
+    
+    async def _ws_stop_bot(self, message: dict, session_id: str, outbox: list):
+        """Handle a stop_bot WebSocket message"""
+        await self.stop_bot()
+        outbox.append(_WS_BOT_STOPPED)
+    
+    async def _ws_restart_bot(self, message: dict, session_id: str, outbox: list):
+        """Handle a restart_bot WebSocket message"""
+        token = message.get("token")
+        if token:
+            await self.restart_bot(token, session_id)
+            outbox.append(_WS_BOT_RESTARTED)
+        else:
+            outbox.append(_WS_NO_RESTART_TOKEN)
+    
+    async def _ws_get_status(self, message: dict, session_id: str, outbox: list):
+        """Handle a get_status WebSocket message"""
+        status = await self.get_bot_status()
+        outbox.append({"type": "bot_status", "data": status})
+    
+    async def _ws_get_commands(self, message: dict, session_id: str, outbox: list):
+        """Handle a get_commands WebSocket message"""
+        commands = await self.command_handler.get_command_list()
+        outbox.append({"type": "commands_list", "data": commands})
+    
+    async def _ws_save_token(self, message: dict, session_id: str, outbox: list):
+        """Handle a save_token WebSocket message"""
+        token = message.get("token")
+        name = message.get("name", "default")
+        
+        if token and self.token_manager.validate_token_format(token):
+            success = await self.token_manager.store_token(name, token)
+            if success:
+                outbox.append({"type": "token_saved", "message": f"Token '{name}' saved"})
+            else:
+                outbox.append(_WS_SAVE_TOKEN_FAILED)
+        else:
+            outbox.append(_WS_INVALID_TOKEN)
+    
+    async def _ws_load_token(self, message: dict, session_id: str, outbox: list):
+        """Handle a load_token WebSocket message"""
+        name = message.get("name", "default")
+        token = await self.token_manager.load_token(name)
+        
+        if token:
+            outbox.append({"type": "token_loaded", "data": {"name": name, "token": token}})
+        else:
+            outbox.append({"type": "error", "message": f"Token '{name}' not found"})
+    
+    async def _ws_list_tokens(self, message: dict, session_id: str, outbox: list):
+        """Handle a list_tokens WebSocket message"""
+        tokens = await self.token_manager.list_tokens()
+        outbox.append({"type": "tokens_list", "data": tokens})
+    
+    async def _ws_delete_token(self, message: dict, session_id: str, outbox: list):
+        """Handle a delete_token WebSocket message"""
+        name = message.get("name")
+        if name:
+            success = await self.token_manager.delete_token(name)
+            if success:
+                outbox.append({"type": "token_deleted", "message": f"Token '{name}' deleted"})
+            else:
+                outbox.append({"type": "error", "message": f"Failed to delete token '{name}'"})
+        else:
+            outbox.append(_WS_NO_TOKEN_NAME)
 
 async def main():
     """Main bot process entry point"""
@@ -289,27 +321,32 @@ async def main():
         # Interactive mode - wait for WebSocket commands
         bot_process.logger.info("Bot process started in interactive mode")
         
-        # Keep the process running
+        # Keep the process running, maintenance runs in the background
+        maintenance_task = asyncio.create_task(bot_process._maintenance_loop())
         try:
-            while True:
-                await asyncio.sleep(1)
-                
-                # Run maintenance every hour
-                if hasattr(bot_process, '_last_maintenance'):
-                    import time
-                    if time.time() - bot_process._last_maintenance > 3600:
-                        await bot_process.run_maintenance()
-                        bot_process._last_maintenance = time.time()
-                else:
-                    import time
-                    bot_process._last_maintenance = time.time()
+            await asyncio.Event().wait()
         
         except KeyboardInterrupt:
             bot_process.logger.info("Received keyboard interrupt")
         finally:
+            maintenance_task.cancel()
             await bot_process.stop_bot()
+            await bot_process.logger.close_event_logs()
+            bot_process.logger.stop_file_logging()
 
 if __name__ == "__main__":
+    # Use uvloop's faster event loop when it is available
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
+    # Records never use thread or process details, so skip collecting them for every LogRecord
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
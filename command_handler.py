@@ -1,11 +1,19 @@
 import asyncio
+import functools
 import re
+import time
 from typing import Dict, List, Callable, Any, Optional
 from datetime import datetime
 from logger import get_logger
 from session_manager import get_session_manager
 from json_manager import JSONManager
 
+# Keywords rejected by the eval command, matched in a single pass
+_DANGEROUS_CODE_RE = re.compile(r"import|exec|eval|__|open|file", re.IGNORECASE)
+
+# Cooldown entries tracked per command before expired ones are swept
+_COOLDOWN_SWEEP_SIZE = 1024
+
 class Command:
     def __init__(self, name: str, func: Callable, description: str = "", 
                  aliases: List[str] = None, admin_only: bool = False,
@@ -17,15 +25,30 @@ class Command:
         self.admin_only = admin_only
         self.cooldown = cooldown
         self.usage = usage
-        self.last_used = {}
+        self.last_used: Dict[str, float] = {}  # user_id -> time.monotonic() of last use
+        self._sweep_at = _COOLDOWN_SWEEP_SIZE
+        self._help_text = ""
+    
+    def build_help_text(self, prefix: str) -> str:
+        """Build the detailed help text for this command"""
+        parts = [f"**{self.name}**", f"Description: {self.description or 'No description'}"]
+        if self.aliases:
+            parts.append(f"Aliases: {', '.join(self.aliases)}")
+        if self.usage:
+            parts.append(f"Usage: {prefix}{self.usage}")
+        if self.cooldown > 0:
+            parts.append(f"Cooldown: {self.cooldown}s")
+        return "\n".join(parts) + "\n"
     
     def can_execute(self, user_id: str) -> tuple[bool, str]:
         """Check if user can execute this command"""
-        now = datetime.now()
+        if not self.cooldown:
+            return True, ""
         
         # Check cooldown
-        if user_id in self.last_used:
-            time_diff = (now - self.last_used[user_id]).total_seconds()
+        last = self.last_used.get(user_id)
+        if last is not None:
+            time_diff = time.monotonic() - last
             if time_diff < self.cooldown:
                 remaining = self.cooldown - time_diff
                 return False, f"Command on cooldown. Wait {remaining:.1f}s"
@@ -34,18 +57,35 @@ class Command:
     
     def mark_used(self, user_id: str):
         """Mark command as used by user"""
-        self.last_used[user_id] = datetime.now()
+        if not self.cooldown:
+            return
+        
+        now = time.monotonic()
+        self.last_used[user_id] = now
+        
+        # Entries older than the cooldown are never consulted again, so drop
+        # them once the map grows to keep memory bounded by active users
+        if len(self.last_used) >= self._sweep_at:
+            cutoff = now - self.cooldown
+            self.last_used = {uid: t for uid, t in self.last_used.items() if t > cutoff}
+            self._sweep_at = max(_COOLDOWN_SWEEP_SIZE, len(self.last_used) * 2)
 
 class CommandHandler:
     def __init__(self, prefix: str = "!"):
         self.prefix = prefix
-        self.commands: Dict[str, Command] = {}
+        self._prefix_len = len(prefix)
+        self.commands: Dict[str, Command] = {}  # canonical name -> command
+        self.aliases: Dict[str, str] = {}  # alias -> canonical name
         self.logger = get_logger()
         self.session_manager = get_session_manager()
         self.json_manager = JSONManager()
         
-        # Command statistics
+        # Command statistics, last_used is kept as an ISO string ready for saving
         self.command_stats = {}
+        self._stats_dirty = False
+        
+        # Cached get_command_list result, cleared when commands or stats change
+        self._command_list_cache: Optional[List[Dict[str, Any]]] = None
         
         # Register default commands
         self._register_default_commands()
@@ -70,47 +110,53 @@ class CommandHandler:
     
     def register_command(self, command: Command):
         """Register a command"""
+        command._help_text = command.build_help_text(self.prefix)
         self.commands[command.name] = command
+        self._command_list_cache = None
         
         # Register aliases
         for alias in command.aliases:
-            self.commands[alias] = command
+            self.aliases[alias] = command.name
         
         self.logger.info(f"Registered command: {command.name}")
     
     def unregister_command(self, name: str):
         """Unregister a command"""
         if name in self.commands:
-            command = self.commands[name]
-            
             # Remove main command and aliases
             del self.commands[name]
-            for alias in command.aliases:
-                if alias in self.commands:
-                    del self.commands[alias]
+            self.aliases = {alias: target for alias, target in self.aliases.items() if target != name}
+            self._command_list_cache = None
             
             self.logger.info(f"Unregistered command: {name}")
     
+    def get_command(self, name: str) -> Optional[Command]:
+        """Look up a command by its name or one of its aliases"""
+        command = self.commands.get(name)
+        if command is None:
+            command = self.commands.get(self.aliases.get(name))
+        return command
+    
     async def process_message(self, message, bot_instance):
         """Process a message for commands"""
-        if not message.content.startswith(self.prefix):
+        content = message.content
+        if content[:self._prefix_len] != self.prefix:
             return False
         
-        # Parse command
-        content = message.content[len(self.prefix):].strip()
-        if not content:
+        # Parse command - split off the name first, then split the args only if present
+        parts = content[self._prefix_len:].split(None, 1)
+        if not parts:
             return False
         
-        parts = content.split()
         command_name = parts[0].lower()
-        args = parts[1:] if len(parts) > 1 else []
+        args = parts[1].split() if len(parts) > 1 else []
         
         # Find command
-        if command_name not in self.commands:
+        command = self.get_command(command_name)
+        if command is None:
             await self._send_error(message, f"Unknown command: {command_name}")
             return False
         
-        command = self.commands[command_name]
         user_id = str(message.author.id)
         
         # Check if user can execute
@@ -124,8 +170,8 @@ class CommandHandler:
             await command.func(message, args, bot_instance)
             command.mark_used(user_id)
             
-            # Update statistics
-            self._update_command_stats(command_name, user_id)
+            # Update statistics under the canonical name so aliases share counts
+            self._update_command_stats(command.name, user_id)
             
             self.logger.info(f"Executed command {command_name} by {user_id}")
             return True
@@ -147,7 +193,9 @@ class CommandHandler:
         stats = self.command_stats[command_name]
         stats["total_uses"] += 1
         stats["unique_users"].add(user_id)
-        stats["last_used"] = datetime.now()
+        stats["last_used"] = datetime.now().isoformat()
+        self._stats_dirty = True
+        self._command_list_cache = None
     
     async def _send_error(self, message, error_text: str):
         """Send error message"""
@@ -168,34 +216,18 @@ class CommandHandler:
         
         @self.command(name="help", description="Show available commands", aliases=["h"])
         async def help_command(message, args, bot):
-            if args and args[0] in self.commands:
+            command = self.get_command(args[0]) if args else None
+            if command:
                 # Show specific command help
-                cmd = self.commands[args[0]]
-                embed_text = f"**{cmd.name}**\n"
-                embed_text += f"Description: {cmd.description or 'No description'}\n"
-                if cmd.aliases:
-                    embed_text += f"Aliases: {', '.join(cmd.aliases)}\n"
-                if cmd.usage:
-                    embed_text += f"Usage: {self.prefix}{cmd.usage}\n"
-                if cmd.cooldown > 0:
-                    embed_text += f"Cooldown: {cmd.cooldown}s\n"
-                
-                await message.channel.send(embed_text)
+                await message.channel.send(command._help_text)
             else:
                 # Show all commands
-                embed_text = f"**Available Commands** (Prefix: {self.prefix})\n\n"
-                
-                # Group commands by category
-                seen_commands = set()
-                for cmd_name, cmd in self.commands.items():
-                    if cmd.name in seen_commands or cmd_name != cmd.name:
-                        continue
-                    
-                    seen_commands.add(cmd.name)
-                    embed_text += f"**{cmd.name}** - {cmd.description or 'No description'}\n"
-                
-                embed_text += f"\nUse `{self.prefix}help <command>` for detailed info"
-                await message.channel.send(embed_text)
+                parts = [f"**Available Commands** (Prefix: {self.prefix})", ""]
+                parts.extend(f"**{cmd.name}** - {cmd.description or 'No description'}"
+                             for cmd in self.commands.values())
+                parts.append("")
+                parts.append(f"Use `{self.prefix}help <command>` for detailed info")
+                await message.channel.send("\n".join(parts))
         
         @self.command(name="ping", description="Check bot latency", cooldown=5)
         async def ping_command(message, args, bot):
@@ -204,39 +236,46 @@ class CommandHandler:
         
         @self.command(name="stats", description="Show bot statistics", cooldown=10)
         async def stats_command(message, args, bot):
-            stats_text = "**Bot Statistics**\n\n"
-            stats_text += f"Guilds: {len(bot.guilds)}\n"
-            stats_text += f"Users: {len(bot.users)}\n"
+            parts = [
+                "**Bot Statistics**",
+                "",
+                f"Guilds: {len(bot.guilds)}",
+                f"Users: {len(bot.users)}"
+            ]
             
             # Command stats
             if self.command_stats:
-                stats_text += "\n**Command Usage:**\n"
-                for cmd_name, stats in self.command_stats.items():
-                    if cmd_name in [cmd.name for cmd in self.commands.values()]:
-                        stats_text += f"{cmd_name}: {stats['total_uses']} uses\n"
+                parts.append("")
+                parts.append("**Command Usage:**")
+                parts.extend(f"{cmd_name}: {stats['total_uses']} uses"
+                             for cmd_name, stats in self.command_stats.items()
+                             if cmd_name in self.commands)
             
-            await message.channel.send(stats_text)
+            await message.channel.send("\n".join(parts) + "\n")
         
         @self.command(name="userinfo", description="Show user information", aliases=["ui"])
         async def userinfo_command(message, args, bot):
             user_data = await bot.get_cached_user_data()
             
-            info_text = "**User Information**\n\n"
-            info_text += f"Username: {user_data.get('username', 'Unknown')}\n"
-            info_text += f"ID: {user_data.get('id', 'Unknown')}\n"
-            info_text += f"Display Name: {user_data.get('display_name', 'Unknown')}\n"
-            info_text += f"Guilds: {user_data.get('guild_count', 0)}\n"
-            info_text += f"Friends: {user_data.get('friend_count', 0)}\n"
+            parts = [
+                "**User Information**",
+                "",
+                f"Username: {user_data.get('username', 'Unknown')}",
+                f"ID: {user_data.get('id', 'Unknown')}",
+                f"Display Name: {user_data.get('display_name', 'Unknown')}",
+                f"Guilds: {user_data.get('guild_count', 0)}",
+                f"Friends: {user_data.get('friend_count', 0)}"
+            ]
             
             nitro_type = user_data.get('nitro_type', 'none')
             if nitro_type != 'none':
-                info_text += f"Nitro: {nitro_type.replace('_', ' ').title()}\n"
+                parts.append(f"Nitro: {nitro_type.replace('_', ' ').title()}")
             
             badges = user_data.get('badges', [])
             if badges:
-                info_text += f"Badges: {', '.join(badges)}\n"
+                parts.append(f"Badges: {', '.join(badges)}")
             
-            await message.channel.send(info_text)
+            await message.channel.send("\n".join(parts) + "\n")
         
         @self.command(name="reload", description="Reload bot configuration", admin_only=True)
         async def reload_command(message, args, bot):
@@ -255,8 +294,7 @@ class CommandHandler:
             code = " ".join(args)
             
             # Security check - basic filtering
-            dangerous_keywords = ['import', 'exec', 'eval', '__', 'open', 'file']
-            if any(keyword in code.lower() for keyword in dangerous_keywords):
+            if _DANGEROUS_CODE_RE.search(code):
                 await self._send_error(message, "Dangerous code detected")
                 return
             
@@ -275,27 +313,30 @@ class CommandHandler:
                 await message.channel.send("No guild information available")
                 return
             
-            guild_text = "**Bot Guilds:**\n\n"
-            for i, guild in enumerate(guilds[:10]):  # Limit to 10
-                guild_text += f"{i+1}. {guild.get('name', 'Unknown')} "
-                guild_text += f"({guild.get('member_count', 0)} members)\n"
+            parts = ["**Bot Guilds:**", ""]
+            parts.extend(f"{i+1}. {guild.get('name', 'Unknown')} ({guild.get('member_count', 0)} members)"
+                         for i, guild in enumerate(guilds[:10]))  # Limit to 10
             
             if len(guilds) > 10:
-                guild_text += f"\n... and {len(guilds) - 10} more guilds"
+                parts.append("")
+                parts.append(f"... and {len(guilds) - 10} more guilds")
             
-            await message.channel.send(guild_text)
+            await message.channel.send("\n".join(parts))
     
     async def get_command_list(self) -> List[Dict[str, Any]]:
-        """Get list of all commands for API"""
+        """Get list of all commands for API
+        
+        The list is cached until a command is (un)registered or used, so
+        callers must treat it as read-only.
+        """
+        if self._command_list_cache is not None:
+            return self._command_list_cache
+        
         commands = []
-        seen_commands = set()
         
-        for cmd_name, cmd in self.commands.items():
-            if cmd.name in seen_commands or cmd_name != cmd.name:
-                continue
-            
-            seen_commands.add(cmd.name)
-            
+        for cmd in self.commands.values():
+            # Convert set to count for JSON serialization
+            stats = self.command_stats.get(cmd.name)
             command_info = {
                 "name": cmd.name,
                 "description": cmd.description,
@@ -303,25 +344,23 @@ class CommandHandler:
                 "admin_only": cmd.admin_only,
                 "cooldown": cmd.cooldown,
                 "usage": cmd.usage,
-                "stats": self.command_stats.get(cmd.name, {
-                    "total_uses": 0,
-                    "unique_users": 0,
-                    "last_used": None
-                })
+                "stats": {
+                    "total_uses": stats["total_uses"] if stats else 0,
+                    "unique_users": len(stats["unique_users"]) if stats else 0,
+                    "last_used": stats["last_used"] if stats else None
+                }
             }
             
-            # Convert set to count for JSON serialization
-            if cmd.name in self.command_stats:
-                command_info["stats"]["unique_users"] = len(
-                    self.command_stats[cmd.name]["unique_users"]
-                )
-            
             commands.append(command_info)
         
+        self._command_list_cache = commands
         return commands
     
     async def save_command_stats(self):
         """Save command statistics to file"""
+        if not self._stats_dirty:
+            return
+        
         try:
             # Convert sets to lists for JSON serialization
             serializable_stats = {}
@@ -329,11 +368,12 @@ class CommandHandler:
                 serializable_stats[cmd_name] = {
                     "total_uses": stats["total_uses"],
                     "unique_users": list(stats["unique_users"]),
-                    "last_used": stats["last_used"].isoformat() if stats["last_used"] else None
+                    "last_used": stats["last_used"]
                 }
             
-            await self.json_manager.write_json("command_stats", serializable_stats)
-            self.logger.info("Command statistics saved")
+            if await self.json_manager.write_json("command_stats", serializable_stats):
+                self._stats_dirty = False
+                self.logger.info("Command statistics saved")
             
         except Exception as e:
             self.logger.error(f"Failed to save command stats: {e}")
@@ -347,9 +387,10 @@ class CommandHandler:
                 self.command_stats[cmd_name] = {
                     "total_uses": stats.get("total_uses", 0),
                     "unique_users": set(stats.get("unique_users", [])),
-                    "last_used": datetime.fromisoformat(stats["last_used"]) if stats.get("last_used") else None
+                    "last_used": stats.get("last_used")
                 }
             
+            self._command_list_cache = None
             self.logger.info("Command statistics loaded")
             
         except Exception as e:
@@ -359,6 +400,12 @@ class CommandHandler:
         """Change command prefix"""
         old_prefix = self.prefix
         self.prefix = new_prefix
+        self._prefix_len = len(new_prefix)
+        
+        # Usage lines in the cached help text include the prefix
+        for command in self.commands.values():
+            command._help_text = command.build_help_text(new_prefix)
+        
         self.logger.info(f"Command prefix changed from '{old_prefix}' to '{new_prefix}'")
     
     def get_prefix(self) -> str:
@@ -366,13 +413,7 @@ class CommandHandler:
         return self.prefix
 
 # Global command handler instance
-_global_command_handler: Optional[CommandHandler] = None
-
+@functools.lru_cache(maxsize=None)
 def get_command_handler() -> CommandHandler:
     """Get or create global command handler instance"""
-    global _global_command_handler
-    
-    if _global_command_handler is None:
-        _global_command_handler = CommandHandler()
-    
-    return _global_command_handler
\ No newline at end of file
+    return CommandHandler()
\ No newline at end of file
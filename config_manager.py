@@ -1,12 +1,85 @@
 #!/usr/bin/env python3
 
 import os
-import json
 import asyncio
-from typing import Optional, Dict, Any
+import copy
+import hashlib
+import aiofiles
+import orjson
+from typing import Optional, Dict, Any, Tuple
 from pathlib import Path
 from logger import get_logger
 
+# Default configuration template, copied before use so it is never mutated
+_DEFAULT_CONFIG: Dict[str, Any] = {
+    "discord": {
+        "token": "",
+        "auto_start": False,
+        "reconnect_attempts": 5,
+        "reconnect_delay": 30
+    },
+    "features": {
+        "nitro_sniper": {
+            "enabled": False,
+            "delay_ms": 50,
+            "webhook_url": ""
+        },
+        "auto_responder": {
+            "enabled": False,
+            "responses": {}
+        },
+        "message_logger": {
+            "enabled": False,
+            "log_dms": True,
+            "log_guilds": []
+        }
+    },
+    "web_interface": {
+        "enabled": True,
+        "host": "127.0.0.1",
+        "port": 8000,
+        "require_auth": False
+    },
+    "logging": {
+        "level": "INFO",
+        "file_logging": True,
+        "console_logging": True
+    }
+}
+
+# Seconds to wait on a config file read before giving up, so a stalled disk can't hang the loop
+_CONFIG_READ_TIMEOUT = 10
+
+def _file_stamp(path: Path) -> Tuple[int, int]:
+    """Modification time and size of a file, changing whenever it is rewritten"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+def _deep_merge_inplace(dst: Dict[str, Any], src: Dict[str, Any]):
+    """Merge src into dst in place, descending into dicts present on both sides"""
+    stack = [(dst, src)]
+    while stack:
+        base_dict, update_dict = stack.pop()
+        for key, value in update_dict.items():
+            current = base_dict.get(key)
+            if type(value) is dict and type(current) is dict:
+                stack.append((current, value))
+            else:
+                base_dict[key] = value
+
+def _flatten_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Map every dotted path in config (sections and leaves) to its value"""
+    flat = {}
+    stack = [("", config)]
+    while stack:
+        prefix, section = stack.pop()
+        for key, value in section.items():
+            path = f"{prefix}{key}"
+            flat[path] = value
+            if type(value) is dict:
+                stack.append((f"{path}.", value))
+    return flat
+
 class ConfigManager:
     """Manages local configuration including Discord tokens and bot settings"""
     
@@ -14,6 +87,21 @@ class ConfigManager:
         self.config_path = Path(config_path)
         self.logger = get_logger()
         self.config: Dict[str, Any] = {}
+        
+        # Pending debounced save, setters schedule it and flush() forces it
+        self._save_task: Optional[asyncio.Task] = None
+        self._save_delay = 0.1
+        self._writing = False
+        self._save_requested = False
+        
+        # Hash of the bytes last read from or written to disk
+        self._last_hash: Optional[bytes] = None
+        
+        # (mtime_ns, size) of the file as last read or written, load_config skips the read while it matches
+        self._last_stamp: Optional[Tuple[int, int]] = None
+        
+        # Dotted-path view of self.config for the getters, rebuilt after every change
+        self._flat: Dict[str, Any] = {}
         self._ensure_config_dir()
         
     def _ensure_config_dir(self):
@@ -24,127 +112,170 @@ class ConfigManager:
         """Load configuration from file"""
         try:
             if self.config_path.exists():
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    self.config = json.load(f)
+                stamp = _file_stamp(self.config_path)
+                if self.config and stamp == self._last_stamp:
+                    return self.config  # Unchanged since we last read or wrote it
+                
+                data = await asyncio.wait_for(self._read_file(), timeout=_CONFIG_READ_TIMEOUT)
+                self.config = orjson.loads(data)
+                self._last_hash = hashlib.blake2b(data, digest_size=16).digest()
+                self._last_stamp = stamp
+                self._rebuild_snapshot()
                 self.logger.info("Configuration loaded successfully")
             else:
                 self.config = self._get_default_config()
+                self._rebuild_snapshot()
                 await self.save_config()
                 self.logger.info("Created default configuration")
                 
             return self.config
         except Exception as e:
             self.logger.error(f"Error loading config: {e}")
+            self._last_stamp = None
             self.config = self._get_default_config()
+            self._rebuild_snapshot()
             return self.config
             
+    async def _read_file(self) -> bytes:
+        """Read the raw configuration file"""
+        async with aiofiles.open(self.config_path, 'rb') as f:
+            return await f.read()
+            
     async def save_config(self):
         """Save configuration to file"""
         try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+            payload = orjson.dumps(self.config, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            
+            # Skip the write when the file already holds these bytes
+            payload_hash = hashlib.blake2b(payload, digest_size=16).digest()
+            if payload_hash == self._last_hash:
+                return
+            
+            # Write to a temporary file and swap it in so a crash never leaves a partial config
+            tmp_path = self.config_path.with_suffix('.json.tmp')
+            async with aiofiles.open(tmp_path, 'wb') as f:
+                await f.write(payload)
+                await f.flush()
+                await asyncio.to_thread(os.fsync, f.fileno())
+            os.replace(tmp_path, self.config_path)
+            
+            self._last_hash = payload_hash
+            self._last_stamp = _file_stamp(self.config_path)
             self.logger.info("Configuration saved successfully")
         except Exception as e:
             self.logger.error(f"Error saving config: {e}")
             
+    def _rebuild_snapshot(self):
+        """Refresh the dotted-path snapshot read by the getters"""
+        self._flat = _flatten_config(self.config)
+        
+    def _schedule_save(self):
+        """Schedule a save so that a burst of updates is written once"""
+        self._rebuild_snapshot()
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.create_task(self._delayed_save())
+        else:
+            self._save_requested = True  # A save already writing may have serialized the old config
+            
+    async def _delayed_save(self):
+        """Wait for the update burst to settle, then save until no change arrived meanwhile"""
+        try:
+            await asyncio.sleep(self._save_delay)
+            self._writing = True
+            self._save_requested = True
+            while self._save_requested:
+                self._save_requested = False
+                await self.save_config()
+        finally:
+            self._writing = False
+            self._save_task = None
+        
+    async def flush(self):
+        """Write any pending configuration changes immediately"""
+        task = self._save_task
+        if task is None or task.done():
+            return
+        
+        if self._writing:
+            # Past its delay and writing, let it finish rather than cut the write short
+            await task
+        else:
+            task.cancel()
+            self._save_task = None
+            await self.save_config()
+            
     def _get_default_config(self) -> Dict[str, Any]:
         """Get default configuration"""
-        return {
-            "discord": {
-                "token": "",
-                "auto_start": False,
-                "reconnect_attempts": 5,
-                "reconnect_delay": 30
-            },
-            "features": {
-                "nitro_sniper": {
-                    "enabled": False,
-                    "delay_ms": 50,
-                    "webhook_url": ""
-                },
-                "auto_responder": {
-                    "enabled": False,
-                    "responses": {}
-                },
-                "message_logger": {
-                    "enabled": False,
-                    "log_dms": True,
-                    "log_guilds": []
-                }
-            },
-            "web_interface": {
-                "enabled": True,
-                "host": "127.0.0.1",
-                "port": 8000,
-                "require_auth": False
-            },
-            "logging": {
-                "level": "INFO",
-                "file_logging": True,
-                "console_logging": True
-            }
-        }
+        return copy.deepcopy(_DEFAULT_CONFIG)
         
     async def get_discord_token(self) -> Optional[str]:
         """Get stored Discord token"""
-        token = self.config.get("discord", {}).get("token", "")
-        return token if token else None
+        return self._flat.get("discord.token") or None
         
     async def set_discord_token(self, token: str):
         """Set Discord token"""
+        if self._flat.get("discord.token") == token:
+            return
         if "discord" not in self.config:
             self.config["discord"] = {}
         self.config["discord"]["token"] = token
-        await self.save_config()
+        self._schedule_save()
         self.logger.info("Discord token updated")
         
     async def get_auto_start(self) -> bool:
         """Check if bot should auto-start"""
-        return self.config.get("discord", {}).get("auto_start", False)
+        return self._flat.get("discord.auto_start", False)
         
     async def set_auto_start(self, enabled: bool):
         """Set auto-start preference"""
+        if self._flat.get("discord.auto_start") == enabled:
+            return
         if "discord" not in self.config:
             self.config["discord"] = {}
         self.config["discord"]["auto_start"] = enabled
-        await self.save_config()
+        self._schedule_save()
         self.logger.info(f"Auto-start {'enabled' if enabled else 'disabled'}")
         
     async def get_feature_config(self, feature: str) -> Dict[str, Any]:
         """Get configuration for a specific feature"""
-        return self.config.get("features", {}).get(feature, {})
+        # A copy, so that changes reach the config only through set_feature_config
+        return copy.deepcopy(self._flat.get(f"features.{feature}", {}))
         
     async def set_feature_config(self, feature: str, config: Dict[str, Any]):
         """Set configuration for a specific feature"""
+        if self._flat.get(f"features.{feature}") == config:
+            return
         if "features" not in self.config:
             self.config["features"] = {}
         self.config["features"][feature] = config
-        await self.save_config()
+        self._schedule_save()
         self.logger.info(f"Feature '{feature}' configuration updated")
         
     async def is_feature_enabled(self, feature: str) -> bool:
         """Check if a feature is enabled"""
-        return self.config.get("features", {}).get(feature, {}).get("enabled", False)
+        return self._flat.get(f"features.{feature}.enabled", False)
         
     async def enable_feature(self, feature: str, enabled: bool = True):
         """Enable or disable a feature"""
+        if self._flat.get(f"features.{feature}.enabled") == enabled:
+            return
         if "features" not in self.config:
             self.config["features"] = {}
         if feature not in self.config["features"]:
             self.config["features"][feature] = {}
         self.config["features"][feature]["enabled"] = enabled
-        await self.save_config()
+        self._schedule_save()
         self.logger.info(f"Feature '{feature}' {'enabled' if enabled else 'disabled'}")
         
     async def get_web_config(self) -> Dict[str, Any]:
         """Get web interface configuration"""
-        return self.config.get("web_interface", {})
+        return self._flat.get("web_interface", {})
         
     async def clear_token(self):
         """Clear stored Discord token"""
-        if "discord" in self.config:
+        if self._flat.get("discord.token"):
             self.config["discord"]["token"] = ""
-            await self.save_config()
+            self._schedule_save()
             self.logger.info("Discord token cleared")
             
     def get_config(self) -> Dict[str, Any]:
@@ -153,13 +284,6 @@ class ConfigManager:
         
     async def update_config(self, updates: Dict[str, Any]):
         """Update configuration with new values"""
-        def deep_update(base_dict, update_dict):
-            for key, value in update_dict.items():
-                if isinstance(value, dict) and key in base_dict and isinstance(base_dict[key], dict):
-                    deep_update(base_dict[key], value)
-                else:
-                    base_dict[key] = value
-                    
-        deep_update(self.config, updates)
-        await self.save_config()
+        _deep_merge_inplace(self.config, updates)
+        self._schedule_save()
         self.logger.info("Configuration updated")
\ No newline at end of file
@@ -1,13 +1,47 @@
 import asyncio
+import bisect
+import csv
+import io
 import json
+import re
 import time
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Iterator, List, Optional, Any
+from dataclasses import dataclass, asdict, field
 from enum import Enum
 from collections import deque
+import heapq
+import itertools
+from operator import attrgetter
 import threading
+import orjson
 from logger import CustomLogger
-from shared_memory import SharedMemoryManager, MessageType
+from shared_memory import SharedMemoryManager, MessageType, get_shared_memory
+
+# Events buffered per WebSocket before new ones are dropped, and the most sent in one frame
+_WS_QUEUE_SIZE = 1000
+_WS_BATCH_SIZE = 64
+
+def _enqueue_event(queue: asyncio.Queue, payload: str):
+    """Put a serialized event on a connection queue, dropping it if the client is too far behind"""
+    try:
+        queue.put_nowait(payload)
+    except asyncio.QueueFull:
+        pass
+
+_timestamp_key = attrgetter('timestamp')
+
+# Last formatted second, messages arrive in bursts within the same second
+_clock_cache: tuple = (None, '')
+
+def _format_clock(timestamp: float) -> str:
+    """Format a timestamp as HH:MM:SS, reusing the string while the second is unchanged"""
+    global _clock_cache
+    second = int(timestamp)
+    cached_second, text = _clock_cache
+    if second != cached_second:
+        text = time.strftime('%H:%M:%S', time.localtime(second))
+        _clock_cache = (second, text)
+    return text
 
 class LogLevel(Enum):
     """Log levels for console output"""
@@ -17,25 +51,58 @@ class LogLevel(Enum):
     ERROR = "ERROR"
     CRITICAL = "CRITICAL"
 
-@dataclass
+@dataclass(slots=True)
 class ConsoleMessage:
     """Structure for console messages"""
     timestamp: float
-    level: LogLevel
+    level: str  # LogLevel value
     source: str  # 'bot', 'web', 'system'
     message: str
     details: Optional[Dict[str, Any]] = None
+    _dict: Optional[Dict[str, Any]] = field(default=None, init=False, repr=False, compare=False)
     
     def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for JSON serialization"""
-        return {
-            'timestamp': self.timestamp,
-            'level': self.level.value,
-            'source': self.source,
-            'message': self.message,
-            'details': self.details,
-            'formatted_time': time.strftime('%H:%M:%S', time.localtime(self.timestamp))
-        }
+        """Convert to dictionary for JSON serialization, built once and shared (treat as read-only)"""
+        if self._dict is None:
+            self._dict = {
+                'timestamp': self.timestamp,
+                'level': self.level,
+                'source': self.source,
+                'message': self.message,
+                'details': self.details,
+                'formatted_time': _format_clock(self.timestamp)
+            }
+        return self._dict
+
+def _csv_row(msg: Dict[str, Any]) -> tuple:
+    """Build a CSV export row from a message dict"""
+    return (
+        msg['timestamp'],
+        msg['level'],
+        msg['source'],
+        msg['message'],
+        json.dumps(msg['details']) if msg['details'] else ''
+    )
+
+def _compile_filters(filters: Dict[str, Any]) -> Optional[Callable[[ConsoleMessage], bool]]:
+    """Compile a filter dict into one predicate, returns None when nothing is filtered"""
+    level_set = frozenset(LogLevel(level).value for level in filters['levels']) if filters.get('levels') else None
+    source_set = frozenset(filters['sources']) if filters.get('sources') else None
+    search = re.compile(re.escape(filters['search_term']), re.IGNORECASE).search if filters.get('search_term') else None
+    time_range = tuple(filters['time_range']) if filters.get('time_range') else None
+    
+    if level_set is None and source_set is None and search is None and time_range is None:
+        return None
+    
+    start_time, end_time = time_range or (None, None)
+    
+    def predicate(msg: ConsoleMessage) -> bool:
+        return ((level_set is None or msg.level in level_set)
+                and (source_set is None or msg.source in source_set)
+                and (search is None or search(msg.message) is not None)
+                and (time_range is None or start_time <= msg.timestamp <= end_time))
+    
+    return predicate
 
 class ConsoleViewer:
     """Manages console output viewing and real-time log streaming"""
@@ -46,11 +113,17 @@ class ConsoleViewer:
         self.logger = CustomLogger()
         
         # In-memory message buffer
+        # add_message can run on the collector thread and the event loop, so writers
+        # serialize on self.lock; readers take lock-free deque.copy() snapshots instead
         self.messages: deque[ConsoleMessage] = deque(maxlen=max_messages)
         self.lock = threading.Lock()
         
-        # WebSocket connections for real-time updates
-        self.websocket_connections: List[Any] = []
+        # Per-level and per-source views of the buffer, updated with it under self.lock
+        self._by_level: Dict[str, deque] = {level.value: deque() for level in LogLevel}
+        self._by_source: Dict[str, deque] = {}
+        
+        # WebSocket connections for real-time updates, websocket -> (loop, event queue, writer task)
+        self.websocket_connections: Dict[Any, tuple] = {}
         self.connection_lock = threading.Lock()
         
         # Filters
@@ -60,22 +133,40 @@ class ConsoleViewer:
             'search_term': '',
             'time_range': None  # (start_time, end_time) or None for all
         }
+        self._active_predicate = _compile_filters(self.active_filters)
         
         # Start background tasks
+        self._collector_task: Optional[asyncio.Task] = None
+        self._collector_notify: Optional[Callable[[], None]] = None
         self._start_log_collector()
         
         self.logger.info("ConsoleViewer initialized")
     
     def _start_log_collector(self):
-        """Start background task to collect logs from various sources"""
-        def collect_logs():
+        """Start the collector task on the running event loop, shared memory sends wake it up"""
+        if self._collector_task is not None:
+            return
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop yet, started by the first WebSocket connection instead
+            return
+        
+        shared_memory = get_shared_memory()
+        wakeup = asyncio.Event()
+        wakeup.set()  # Pick up anything queued before we subscribed
+        
+        def notify():
+            loop.call_soon_threadsafe(wakeup.set)
+        
+        async def collect_logs():
             while True:
                 try:
-                    # Collect from shared memory
-                    shared_memory = get_shared_memory()
-                    messages = shared_memory.receive_messages(max_messages=50)
+                    await wakeup.wait()
+                    wakeup.clear()
                     
-                    for msg in messages:
+                    for msg in shared_memory.drain():
                         if msg.message_type in [MessageType.ERROR, MessageType.BOT_STATUS]:
                             level = LogLevel.ERROR if msg.message_type == MessageType.ERROR else LogLevel.INFO
                             self.add_message(
@@ -85,56 +176,50 @@ class ConsoleViewer:
                                 details=msg.data
                             )
                     
-                    # Collect from logger files
-                    self._collect_from_log_files()
-                    
-                    time.sleep(1)  # Check every second
-                    
+                except asyncio.CancelledError:
+                    raise
                 except Exception as e:
                     self.logger.error(f"Error in log collector: {e}")
-                    time.sleep(5)  # Wait longer on error
+                    await asyncio.sleep(5)  # Wait longer on error
         
-        thread = threading.Thread(target=collect_logs, daemon=True)
-        thread.start()
+        self._collector_notify = notify
+        shared_memory.subscribe(notify)
+        self._collector_task = loop.create_task(collect_logs())
     
-    def _collect_from_log_files(self):
-        """Collect recent logs from log files"""
-        try:
-            # Get recent logs from the logger
-            recent_logs = self.logger.get_recent_logs(limit=10)
-            
-            for log_entry in recent_logs:
-                # Parse log entry and add to console
-                if isinstance(log_entry, dict):
-                    level_str = log_entry.get('level', 'INFO')
-                    try:
-                        level = LogLevel(level_str)
-                    except ValueError:
-                        level = LogLevel.INFO
-                    
-                    self.add_message(
-                        level=level,
-                        source='system',
-                        message=log_entry.get('message', ''),
-                        details=log_entry
-                    )
-        except Exception as e:
-            # Don't log this error to avoid recursion
-            pass
+    def close(self):
+        """Stop the collector task and writer tasks"""
+        if self._collector_task is not None:
+            get_shared_memory().unsubscribe(self._collector_notify)
+            self._collector_task.cancel()
+            self._collector_task = None
+        
+        for websocket in list(self.websocket_connections):
+            self.remove_websocket_connection(websocket)
     
     def add_message(self, level: LogLevel, source: str, message: str, details: Optional[Dict[str, Any]] = None):
         """Add a new console message"""
         try:
             console_msg = ConsoleMessage(
                 timestamp=time.time(),
-                level=level,
+                level=level.value if isinstance(level, LogLevel) else level,
                 source=source,
                 message=message,
                 details=details
             )
             
             with self.lock:
+                # The deque drops its oldest entry on append once full, and that entry
+                # is also the oldest in its level and source views
+                if len(self.messages) == self.max_messages:
+                    evicted = self.messages[0]
+                    self._by_level[evicted.level].popleft()
+                    source_view = self._by_source[evicted.source]
+                    source_view.popleft()
+                    if not source_view:
+                        del self._by_source[evicted.source]
                 self.messages.append(console_msg)
+                self._by_level.setdefault(console_msg.level, deque()).append(console_msg)
+                self._by_source.setdefault(console_msg.source, deque()).append(console_msg)
             
             # Broadcast to connected WebSockets
             self._broadcast_message(console_msg)
@@ -146,8 +231,13 @@ class ConsoleViewer:
     def get_messages(self, filters: Optional[Dict[str, Any]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get console messages with optional filtering"""
         try:
-            with self.lock:
-                messages = list(self.messages)
+            # Common case, an unfiltered tail: skip the filter pipeline and the full list copy
+            if not filters and limit:
+                snapshot = self.messages.copy()
+                start = max(0, len(snapshot) - limit)
+                return [msg.to_dict() for msg in itertools.islice(snapshot, start, None)]
+            
+            messages = self._select_candidates(filters) if filters else list(self.messages.copy())
             
             # Apply filters
             if filters:
@@ -163,36 +253,61 @@ class ConsoleViewer:
             self.logger.error(f"Error getting messages: {e}")
             return []
     
-    def _apply_filters(self, messages: List[ConsoleMessage], filters: Dict[str, Any]) -> List[ConsoleMessage]:
-        """Apply filters to message list"""
-        filtered = messages
+    def _select_candidates(self, filters: Dict[str, Any]) -> List[ConsoleMessage]:
+        """Pick the smallest indexed subset that can satisfy the level/source/time filters"""
+        candidates = self._select_indexed(filters)
         
-        # Level filter
-        if 'levels' in filters and filters['levels']:
-            level_set = set(LogLevel(level) for level in filters['levels'])
-            filtered = [msg for msg in filtered if msg.level in level_set]
+        # Candidates are in timestamp order, so a time window is two binary searches
+        if filters.get('time_range'):
+            start_time, end_time = filters['time_range']
+            lo = bisect.bisect_left(candidates, start_time, key=_timestamp_key)
+            hi = bisect.bisect_right(candidates, end_time, lo=lo, key=_timestamp_key)
+            candidates = candidates[lo:hi]
+        
+        return candidates
+    
+    def _select_indexed(self, filters: Dict[str, Any]) -> List[ConsoleMessage]:
+        """Snapshot the level or source view that best narrows the filters"""
+        views = None
         
-        # Source filter
-        if 'sources' in filters and filters['sources']:
-            source_set = set(filters['sources'])
-            filtered = [msg for msg in filtered if msg.source in source_set]
+        if filters.get('levels'):
+            levels = {LogLevel(level).value for level in filters['levels']}
+            views = [self._by_level[level] for level in levels if self._by_level.get(level)]
         
-        # Search term filter
-        if 'search_term' in filters and filters['search_term']:
-            search_term = filters['search_term'].lower()
-            filtered = [msg for msg in filtered if search_term in msg.message.lower()]
+        if filters.get('sources'):
+            source_views = [self._by_source.get(source) for source in set(filters['sources'])]
+            source_views = [view for view in source_views if view]
+            if views is None or sum(map(len, source_views)) < sum(map(len, views)):
+                views = source_views
         
-        # Time range filter
-        if 'time_range' in filters and filters['time_range']:
-            start_time, end_time = filters['time_range']
-            filtered = [msg for msg in filtered if start_time <= msg.timestamp <= end_time]
+        if views is None:
+            return list(self.messages.copy())
         
-        return filtered
+        # Snapshot each view, a concurrent add_message may be appending to them
+        snapshots = [view.copy() for view in views]
+        if len(snapshots) == 1:
+            return list(snapshots[0])
+        
+        # Several views, merge them back into buffer order
+        return list(heapq.merge(*snapshots, key=_timestamp_key))
+    
+    def _apply_filters(self, messages: List[ConsoleMessage], filters: Dict[str, Any]) -> List[ConsoleMessage]:
+        """Apply filters to message list"""
+        # The active filters are compiled once in set_filters, ad-hoc ones on the fly
+        if filters is self.active_filters:
+            predicate = self._active_predicate
+        else:
+            predicate = _compile_filters(filters)
+        
+        if predicate is None:
+            return messages
+        return list(filter(predicate, messages))
     
     def set_filters(self, filters: Dict[str, Any]):
         """Update active filters"""
         try:
             self.active_filters.update(filters)
+            self._active_predicate = _compile_filters(self.active_filters)
             self.logger.debug(f"Updated console filters: {filters}")
         except Exception as e:
             self.logger.error(f"Error setting filters: {e}")
@@ -202,6 +317,9 @@ class ConsoleViewer:
         try:
             with self.lock:
                 self.messages.clear()
+                for view in self._by_level.values():
+                    view.clear()
+                self._by_source.clear()
             
             # Broadcast clear event
             self._broadcast_event({'type': 'clear'})
@@ -214,52 +332,69 @@ class ConsoleViewer:
     def export_logs(self, format_type: str = 'json', filters: Optional[Dict[str, Any]] = None) -> str:
         """Export console logs in specified format"""
         try:
-            messages = self.get_messages(filters=filters)
-            
             if format_type == 'json':
-                return json.dumps(messages, indent=2)
-            
-            elif format_type == 'text':
-                lines = []
-                for msg in messages:
-                    timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(msg['timestamp']))
-                    lines.append(f"[{timestamp}] [{msg['level']}] [{msg['source']}] {msg['message']}")
-                return '\n'.join(lines)
+                return orjson.dumps(self.get_messages(filters=filters), option=orjson.OPT_INDENT_2).decode('utf-8')
             
-            elif format_type == 'csv':
-                import csv
-                import io
-                
-                output = io.StringIO()
-                writer = csv.writer(output)
-                
-                # Header
-                writer.writerow(['timestamp', 'level', 'source', 'message', 'details'])
-                
-                # Data
-                for msg in messages:
-                    writer.writerow([
-                        msg['timestamp'],
-                        msg['level'],
-                        msg['source'],
-                        msg['message'],
-                        json.dumps(msg['details']) if msg['details'] else ''
-                    ])
-                
-                return output.getvalue()
-            
-            else:
-                raise ValueError(f"Unsupported format: {format_type}")
+            return ''.join(self.export_logs_iter(format_type, filters))
                 
         except Exception as e:
             self.logger.error(f"Error exporting logs: {e}")
             return f"Error exporting logs: {e}"
     
+    def export_logs_iter(self, format_type: str = 'json', filters: Optional[Dict[str, Any]] = None,
+                         chunk_size: int = 500) -> Iterator[str]:
+        """Export console logs as a stream of text chunks, suitable for a streaming response"""
+        if format_type not in ('json', 'text', 'csv'):
+            raise ValueError(f"Unsupported format: {format_type}")
+        
+        messages = self.get_messages(filters=filters)
+        chunks = (messages[i:i + chunk_size] for i in range(0, len(messages), chunk_size))
+        
+        if format_type == 'json':
+            yield '['
+            for index, chunk in enumerate(chunks):
+                separator = ',' if index else ''
+                yield separator + ','.join(orjson.dumps(msg).decode('utf-8') for msg in chunk)
+            yield ']'
+        
+        elif format_type == 'text':
+            for index, chunk in enumerate(chunks):
+                lines = (f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(msg['timestamp']))}] "
+                         f"[{msg['level']}] [{msg['source']}] {msg['message']}" for msg in chunk)
+                yield ('\n' if index else '') + '\n'.join(lines)
+        
+        else:
+            output = io.StringIO()
+            writer = csv.writer(output)
+            
+            # Header
+            writer.writerow(['timestamp', 'level', 'source', 'message', 'details'])
+            
+            # Data, one writerows call per chunk
+            for chunk in chunks:
+                writer.writerows(_csv_row(msg) for msg in chunk)
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+            
+            # Header only when there are no messages
+            if output.tell():
+                yield output.getvalue()
+    
     def add_websocket_connection(self, websocket):
-        """Add a WebSocket connection for real-time updates"""
+        """Add a WebSocket connection for real-time updates
+        
+        Must be called from the event loop that owns the WebSocket, a writer
+        task is started there to drain the connection's event queue.
+        """
         try:
+            loop = asyncio.get_running_loop()
+            self._start_log_collector()
+            queue: asyncio.Queue = asyncio.Queue(maxsize=_WS_QUEUE_SIZE)
+            task = loop.create_task(self._ws_writer(websocket, queue))
+            
             with self.connection_lock:
-                self.websocket_connections.append(websocket)
+                self.websocket_connections[websocket] = (loop, queue, task)
             
             self.logger.debug(f"Added WebSocket connection. Total: {len(self.websocket_connections)}")
             
@@ -270,14 +405,39 @@ class ConsoleViewer:
         """Remove a WebSocket connection"""
         try:
             with self.connection_lock:
-                if websocket in self.websocket_connections:
-                    self.websocket_connections.remove(websocket)
+                entry = self.websocket_connections.pop(websocket, None)
+            
+            if entry:
+                loop, _, task = entry
+                loop.call_soon_threadsafe(task.cancel)
             
             self.logger.debug(f"Removed WebSocket connection. Total: {len(self.websocket_connections)}")
             
         except Exception as e:
             self.logger.error(f"Error removing WebSocket connection: {e}")
     
+    async def _ws_writer(self, websocket, queue: asyncio.Queue):
+        """Drain queued events to a WebSocket, coalescing bursts into one frame"""
+        send = websocket.send_text if hasattr(websocket, 'send_text') else websocket.send
+        try:
+            while True:
+                batch = [await queue.get()]
+                while not queue.empty() and len(batch) < _WS_BATCH_SIZE:
+                    batch.append(queue.get_nowait())
+                
+                # Events are already serialized, so a batch frame is just spliced together
+                if len(batch) == 1:
+                    payload = batch[0]
+                else:
+                    payload = '{"type":"batch","events":[' + ','.join(batch) + ']}'
+                
+                await send(payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Remove broken connections
+            self.remove_websocket_connection(websocket)
+    
     def _broadcast_message(self, message: ConsoleMessage):
         """Broadcast a new message to all connected WebSockets"""
         if not self.websocket_connections:
@@ -295,32 +455,31 @@ class ConsoleViewer:
             self.logger.error(f"Error broadcasting message: {e}")
     
     def _broadcast_event(self, event_data: Dict[str, Any]):
-        """Broadcast an event to all connected WebSockets"""
+        """Queue an event for every connected WebSocket"""
         if not self.websocket_connections:
             return
         
         try:
-            message = json.dumps(event_data)
+            # Serialize once, every connection gets the same text
+            payload = orjson.dumps(event_data).decode('utf-8')
             
-            # Create a copy of connections to avoid modification during iteration
-            with self.connection_lock:
-                connections = self.websocket_connections.copy()
+            # Copy the connections to avoid modification during iteration, the copy is atomic
+            connections = list(self.websocket_connections.items())
             
-            # Send to all connections (this should be done in an async context)
-            for websocket in connections:
+            # Events can come from other threads, so hand them to each loop safely
+            dead = []
+            for websocket, (loop, queue, _) in connections:
                 try:
-                    # This is a simplified approach - in practice, you'd want to use asyncio
-                    # and handle this properly in an async context
-                    if hasattr(websocket, 'send_text'):
-                        # For FastAPI WebSocket
-                        asyncio.create_task(websocket.send_text(message))
-                    elif hasattr(websocket, 'send'):
-                        # For other WebSocket implementations
-                        asyncio.create_task(websocket.send(message))
-                        
-                except Exception as e:
-                    # Remove broken connections
-                    self.remove_websocket_connection(websocket)
+                    loop.call_soon_threadsafe(_enqueue_event, queue, payload)
+                except RuntimeError:
+                    # Loop already closed, the writer is gone with it
+                    dead.append(websocket)
+            
+            # Drop dead connections in one pass once the fan-out is done
+            if dead:
+                with self.connection_lock:
+                    for websocket in dead:
+                        self.websocket_connections.pop(websocket, None)
                     
         except Exception as e:
             self.logger.error(f"Error broadcasting event: {e}")
@@ -328,21 +487,15 @@ class ConsoleViewer:
     def get_stats(self) -> Dict[str, Any]:
         """Get console viewer statistics"""
         try:
-            with self.lock:
-                message_count = len(self.messages)
-                
-                # Count by level
-                level_counts = {level.value: 0 for level in LogLevel}
-                for msg in self.messages:
-                    level_counts[msg.level.value] += 1
-                
-                # Count by source
-                source_counts = {}
-                for msg in self.messages:
-                    source_counts[msg.source] = source_counts.get(msg.source, 0) + 1
+            message_count = len(self.messages)
             
-            with self.connection_lock:
-                connection_count = len(self.websocket_connections)
+            # Count by level
+            level_counts = {level.value: len(self._by_level[level.value]) for level in LogLevel}
+            
+            # Count by source
+            source_counts = {source: len(view) for source, view in list(self._by_source.items())}
+            
+            connection_count = len(self.websocket_connections)
             
             return {
                 'total_messages': message_count,
@@ -357,18 +510,24 @@ class ConsoleViewer:
             self.logger.error(f"Error getting stats: {e}")
             return {}
 
-# Singleton instance for global access
+# Singleton instance for global access, created under a lock so concurrent
+# first calls cannot each build a viewer with its own collector
 _console_viewer_instance: Optional[ConsoleViewer] = None
+_console_viewer_lock = threading.Lock()
 
 def get_console_viewer() -> ConsoleViewer:
     """Get the global console viewer instance"""
     global _console_viewer_instance
     if _console_viewer_instance is None:
-        _console_viewer_instance = ConsoleViewer()
+        with _console_viewer_lock:
+            if _console_viewer_instance is None:
+                _console_viewer_instance = ConsoleViewer()
     return _console_viewer_instance
 
 def close_console_viewer():
     """Close the global console viewer instance"""
     global _console_viewer_instance
-    if _console_viewer_instance is not None:
-        _console_viewer_instance = None
\ No newline at end of file
+    with _console_viewer_lock:
+        if _console_viewer_instance is not None:
+            _console_viewer_instance.close()
+            _console_viewer_instance = None
\ No newline at end of file
@@ -1,40 +1,117 @@
 import discord
 import asyncio
 import json
+from collections import deque
 from typing import Optional, Dict, Any, List
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
 from logger import get_logger
 from session_manager import get_session_manager
 from json_manager import JSONManager
 
-class RateLimiter:
-    def __init__(self):
-        self.requests = {}
-        self.logger = get_logger()
+_now_iso_cache: tuple = (None, '')
+
+def _now_iso() -> str:
+    """Current local time in ISO format, reusing the string within the same millisecond"""
+    global _now_iso_cache
+    now = time.time()
+    millisecond = int(now * 1000)
+    cached_millisecond, text = _now_iso_cache
+    if millisecond != cached_millisecond:
+        text = datetime.fromtimestamp(now).isoformat()
+        _now_iso_cache = (millisecond, text)
+    return text
+
+class BucketLimiter:
+    """Rate limit state for a single bucket"""
+    __slots__ = ('name', 'times', 'max_requests', 'window', 'logger')
     
-    async def wait_if_rate_limited(self, endpoint: str, max_requests: int = 50, window_seconds: int = 60):
-        """Wait if rate limited for specific endpoint"""
-        now = time.time()
-        
-        if endpoint not in self.requests:
-            self.requests[endpoint] = []
+    def __init__(self, name: str, max_requests: int = 50, window_seconds: int = 60, logger=None):
+        self.name = name
+        self.times: deque = deque()  # time.monotonic() of recent requests
+        self.max_requests = max_requests
+        self.window = window_seconds
+        self.logger = logger or get_logger()
+    
+    async def acquire(self):
+        """Wait if rate limited"""
+        now = time.monotonic()
+        times = self.times
         
-        # Clean old requests
-        self.requests[endpoint] = [
-            req_time for req_time in self.requests[endpoint]
-            if now - req_time < window_seconds
-        ]
+        # Clean old requests, they are in order so only the left end can expire
+        cutoff = now - self.window
+        while times and times[0] <= cutoff:
+            times.popleft()
         
         # Check if rate limited
-        if len(self.requests[endpoint]) >= max_requests:
-            wait_time = window_seconds - (now - self.requests[endpoint][0])
+        if len(times) >= self.max_requests:
+            wait_time = self.window - (now - times[0])
             if wait_time > 0:
-                self.logger.warning(f"Rate limited on {endpoint}, waiting {wait_time:.2f}s")
+                self.logger.warning(f"Rate limited on {self.name}, waiting {wait_time:.2f}s")
                 await asyncio.sleep(wait_time)
         
         # Add current request
-        self.requests[endpoint].append(now)
+        times.append(now)
+
+class RateLimiter:
+    def __init__(self):
+        self.buckets: Dict[str, BucketLimiter] = {}
+        self.logger = get_logger()
+    
+    def bucket(self, name: str, max_requests: int = 50, window_seconds: int = 60) -> BucketLimiter:
+        """Get or create the limiter for a bucket, the first caller sets its local limits"""
+        limiter = self.buckets.get(name)
+        if limiter is None:
+            limiter = self.buckets[name] = BucketLimiter(name, max_requests, window_seconds, self.logger)
+        return limiter
+
+# Discord limits by Nitro status, plain dicts so user data stays JSON serializable; treat as read-only
+_DISCORD_LIMITS: Dict[str, Dict[str, int]] = {
+    "none": {
+        "guilds": 100,
+        "friends": 1000,
+        "file_size_mb": 8,
+        "emoji_slots": 50
+    },
+    "nitro_classic": {
+        "guilds": 100,
+        "friends": 1000,
+        "file_size_mb": 50,
+        "emoji_slots": 50
+    },
+    "nitro": {
+        "guilds": 200,
+        "friends": 1000,
+        "file_size_mb": 100,
+        "emoji_slots": 200
+    },
+    "nitro_basic": {
+        "guilds": 100,
+        "friends": 1000,
+        "file_size_mb": 25,
+        "emoji_slots": 50
+    }
+}
+
+# Seconds each user data section stays cached, by how often it actually changes
+_USER_CACHE_TTLS = {
+    "profile": 24 * 60 * 60,
+    "guilds": 60,
+    "friends": 30 * 60,
+    "nitro": 6 * 60 * 60
+}
+
+# Process-wide rate limiter, so every bot session in this process shares one view of Discord's limits
+_global_rate_limiter: Optional[RateLimiter] = None
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create global rate limiter instance"""
+    global _global_rate_limiter
+    
+    if _global_rate_limiter is None:
+        _global_rate_limiter = RateLimiter()
+    
+    return _global_rate_limiter
 
 class MessageQueue:
     def __init__(self, max_size: int = 1000):
@@ -48,7 +125,7 @@ class MessageQueue:
             event = {
                 "type": event_type,
                 "data": data,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": _now_iso()
             }
             await self.queue.put(event)
         except asyncio.QueueFull:
@@ -58,26 +135,37 @@ class MessageQueue:
         """Process events from queue"""
         self.processing = True
         
-        while self.processing:
+        while True:
+            event = await self.queue.get()
+            if event is None:  # Sentinel from stop_processing
+                self.queue.task_done()
+                break
+            
             try:
-                event = await asyncio.wait_for(self.queue.get(), timeout=1.0)
                 await handler(event)
-                self.queue.task_done()
-            except asyncio.TimeoutError:
-                continue
             except Exception as e:
                 self.logger.error(f"Error processing event: {e}")
+            finally:
+                self.queue.task_done()
     
-    def stop_processing(self):
-        """Stop processing events"""
+    async def stop_processing(self) -> bool:
+        """Stop processing events, returns False when the queue is full and the processor must be cancelled"""
         self.processing = False
+        try:
+            # Never wait for room, a dead processor would leave a full queue that never drains
+            self.queue.put_nowait(None)
+            return True
+        except asyncio.QueueFull:
+            return False
 
 class DiscordSelfBot(discord.Client):
     def __init__(self, session_id: str, **kwargs):
         intents = discord.Intents.default()
         intents.guilds = True
-        intents.members = True
-        intents.presences = True
+        # Member and presence updates are not used (only guild.member_count is read), and
+        # subscribing to them streams every member of every guild over the gateway
+        intents.members = False
+        intents.presences = False
         intents.message_content = True
         
         super().__init__(intents=intents, **kwargs)
@@ -86,7 +174,8 @@ class DiscordSelfBot(discord.Client):
         self.logger = get_logger()
         self.session_manager = get_session_manager()
         self.json_manager = JSONManager()
-        self.rate_limiter = RateLimiter()
+        self.rate_limiter = get_rate_limiter()
+        self.user_data_bucket: Optional[BucketLimiter] = None  # Resolved once the account id is known
         self.message_queue = MessageQueue()
         
         # Connection management
@@ -99,10 +188,8 @@ class DiscordSelfBot(discord.Client):
         # Event processing
         self.event_processor_task = None
         
-        # User data cache
-        self.user_data_cache = {}
-        self.cache_expiry = timedelta(minutes=5)
-        self.last_cache_update = None
+        # User data cache, section -> (data, time.monotonic() expiry), see _USER_CACHE_TTLS
+        self._user_cache: Dict[str, tuple[Dict[str, Any], float]] = {}
 
     async def wait_until_ready(self):
         """Wait until the bot is ready."""
@@ -118,8 +205,8 @@ class DiscordSelfBot(discord.Client):
             # Mark session as Discord ready
             await self.session_manager.set_discord_ready(self.session_id, True)
             
-            # Get comprehensive user data
-            user_data = await self._get_comprehensive_user_data()
+            # Get comprehensive user data, refreshing every cached section
+            user_data = await self.get_cached_user_data(force_refresh=True)
             
             # Send to session
             await self.session_manager.broadcast_to_session(self.session_id, {
@@ -127,10 +214,6 @@ class DiscordSelfBot(discord.Client):
                 "data": user_data
             })
             
-            # Cache the data
-            self.user_data_cache = user_data
-            self.last_cache_update = datetime.now()
-            
             # Log the event
             await self.logger.log_discord_event("ready", {
                 "user_id": str(self.user.id),
@@ -150,7 +233,7 @@ class DiscordSelfBot(discord.Client):
         await self.session_manager.set_discord_ready(self.session_id, False)
         await self.session_manager.broadcast_to_session(self.session_id, {
             "type": "discord_disconnected",
-            "data": {"timestamp": datetime.now().isoformat()}
+            "data": {"timestamp": _now_iso()}
         })
     
     async def on_resumed(self):
@@ -161,7 +244,7 @@ class DiscordSelfBot(discord.Client):
         
         await self.session_manager.broadcast_to_session(self.session_id, {
             "type": "discord_resumed",
-            "data": {"timestamp": datetime.now().isoformat()}
+            "data": {"timestamp": _now_iso()}
         })
     
     async def on_error(self, event, *args, **kwargs):
@@ -197,70 +280,78 @@ class DiscordSelfBot(discord.Client):
                 "timestamp": message.created_at.isoformat()
             })
     
-    async def _get_comprehensive_user_data(self) -> Dict[str, Any]:
-        """Get comprehensive user data with rate limiting"""
+    async def _get_user_data_sections(self, names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Build the named user data sections with rate limiting"""
+        if self.user_data_bucket is None:
+            self.user_data_bucket = self.rate_limiter.bucket(self._bucket_key("user_data"))
+        await self.user_data_bucket.acquire()
+        builders = {
+            "profile": self._get_profile_section,
+            "guilds": self._get_guilds_section,
+            "friends": self._get_friends_section,
+            "nitro": self._get_nitro_section
+        }
+        return {name: await builders[name]() for name in names}
+    
+    async def _get_profile_section(self) -> Dict[str, Any]:
+        """Basic user info, flags and badges"""
+        user = self.user
+        profile = {
+            "id": str(user.id),
+            "username": user.name,
+            "discriminator": user.discriminator,
+            "display_name": user.display_name or user.name,
+            "avatar_url": str(user.avatar.url) if user.avatar else None,
+            "bot": user.bot,
+            "created_at": user.created_at.isoformat()
+        }
+        
+        if hasattr(user, 'public_flags'):
+            profile["badges"] = [flag.name for flag in user.public_flags.all()]
+        else:
+            profile["badges"] = []
+        
+        return profile
+    
+    async def _get_guilds_section(self) -> Dict[str, Any]:
+        """Guild count and a summary of the first guilds"""
+        uid = self.user.id
+        return {
+            "guild_count": len(self.guilds),
+            "guilds": [
+                {
+                    "id": str(guild.id),
+                    "name": guild.name,
+                    "member_count": guild.member_count,
+                    "owner": guild.owner_id == uid
+                }
+                for guild in self.guilds[:50]  # Limit to first 50 guilds
+            ]
+        }
+    
+    async def _get_friends_section(self) -> Dict[str, Any]:
+        """Friend count and the first friends, if available"""
         try:
-            await self.rate_limiter.wait_if_rate_limited("user_data")
-            
-            # Basic user info
-            user_data = {
-                "id": str(self.user.id),
-                "username": self.user.name,
-                "discriminator": self.user.discriminator,
-                "display_name": self.user.display_name or self.user.name,
-                "avatar_url": str(self.user.avatar.url) if self.user.avatar else None,
-                "bot": self.user.bot,
-                "created_at": self.user.created_at.isoformat()
-            }
-            
-            # Flags and badges
-            if hasattr(self.user, 'public_flags'):
-                user_data["badges"] = [flag.name for flag in self.user.public_flags.all()]
-            else:
-                user_data["badges"] = []
-            
-            # Guild information
-            user_data["guild_count"] = len(self.guilds)
-            user_data["guilds"] = []
-            
-            for guild in self.guilds[:50]:  # Limit to first 50 guilds
-                try:
-                    guild_data = {
-                        "id": str(guild.id),
-                        "name": guild.name,
-                        "member_count": guild.member_count,
-                        "owner": guild.owner_id == self.user.id if guild.owner_id else False
-                    }
-                    user_data["guilds"].append(guild_data)
-                except Exception as e:
-                    self.logger.debug(f"Error getting guild data for {guild.id}: {e}")
-            
-            # Friends count (if available)
-            try:
-                friends = await self._get_friends_safely()
-                user_data["friend_count"] = len(friends)
-                user_data["friends"] = friends[:20]  # Limit to first 20 friends
-            except Exception as e:
-                self.logger.debug(f"Could not get friends: {e}")
-                user_data["friend_count"] = 0
-                user_data["friends"] = []
-            
-            # Nitro status detection
-            user_data["nitro_type"] = await self._detect_nitro_status()
-            
-            # Limits based on Nitro status
-            limits = self._get_discord_limits(user_data["nitro_type"])
-            user_data["limits"] = limits
-            
-            return user_data
-            
-        except Exception as e:
-            self.logger.error(f"Error getting comprehensive user data: {e}", exc_info=True)
+            friends = await self._get_friends_safely()
             return {
-                "id": str(self.user.id) if self.user else "unknown",
-                "username": self.user.name if self.user else "unknown",
-                "error": str(e)
+                "friend_count": len(friends),
+                "friends": friends[:20]  # Limit to first 20 friends
             }
+        except Exception as e:
+            self.logger.debug(f"Could not get friends: {e}")
+            return {"friend_count": 0, "friends": []}
+    
+    async def _get_nitro_section(self) -> Dict[str, Any]:
+        """Nitro status and the limits that follow from it"""
+        nitro_type = await self._detect_nitro_status()
+        return {
+            "nitro_type": nitro_type,
+            "limits": self._get_discord_limits(nitro_type)
+        }
+    
+    def _bucket_key(self, bucket: str) -> str:
+        """Scope a rate limit bucket to this account, Discord's limits are per user"""
+        return f"{bucket}:{self.user.id}" if self.user else bucket
     
     async def _get_friends_safely(self) -> List[Dict[str, Any]]:
         """Safely get friends list"""
@@ -307,34 +398,7 @@ class DiscordSelfBot(discord.Client):
     
     def _get_discord_limits(self, nitro_type: str) -> Dict[str, int]:
         """Get Discord limits based on Nitro status"""
-        limits = {
-            "none": {
-                "guilds": 100,
-                "friends": 1000,
-                "file_size_mb": 8,
-                "emoji_slots": 50
-            },
-            "nitro_classic": {
-                "guilds": 100,
-                "friends": 1000,
-                "file_size_mb": 50,
-                "emoji_slots": 50
-            },
-            "nitro": {
-                "guilds": 200,
-                "friends": 1000,
-                "file_size_mb": 100,
-                "emoji_slots": 200
-            },
-            "nitro_basic": {
-                "guilds": 100,
-                "friends": 1000,
-                "file_size_mb": 25,
-                "emoji_slots": 50
-            }
-        }
-        
-        return limits.get(nitro_type, limits["none"])
+        return _DISCORD_LIMITS.get(nitro_type, _DISCORD_LIMITS["none"])
     
     async def _handle_queued_event(self, event: Dict[str, Any]):
         """Handle events from the message queue"""
@@ -359,9 +423,8 @@ class DiscordSelfBot(discord.Client):
             self.logger.error(f"Error handling queued event: {e}", exc_info=True)
     
     async def _invalidate_user_cache(self):
-        """Invalidate user data cache"""
-        self.last_cache_update = None
-        self.user_data_cache = {}
+        """Invalidate the guild section of the user data cache"""
+        self._user_cache.pop("guilds", None)
     
     async def _send_error_to_session(self, error_type: str, error_message: str):
         """Send error message to session"""
@@ -371,25 +434,39 @@ class DiscordSelfBot(discord.Client):
                 "data": {
                     "error_type": error_type,
                     "message": error_message,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": _now_iso()
                 }
             })
         except Exception as e:
             self.logger.error(f"Failed to send error to session: {e}")
     
     async def get_cached_user_data(self, force_refresh: bool = False) -> Dict[str, Any]:
-        """Get user data from cache or refresh if needed"""
-        now = datetime.now()
+        """Get user data from cache, refreshing only the sections that expired"""
+        now = time.monotonic()
+        stale = [
+            name for name in _USER_CACHE_TTLS
+            if force_refresh or name not in self._user_cache or self._user_cache[name][1] <= now
+        ]
         
-        if (force_refresh or 
-            not self.user_data_cache or 
-            not self.last_cache_update or 
-            now - self.last_cache_update > self.cache_expiry):
+        if stale:
+            try:
+                sections = await self._get_user_data_sections(stale)
+            except Exception as e:
+                self.logger.error(f"Error getting user data: {e}", exc_info=True)
+                return {
+                    "id": str(self.user.id) if self.user else "unknown",
+                    "username": self.user.name if self.user else "unknown",
+                    "error": str(e)
+                }
             
-            self.user_data_cache = await self._get_comprehensive_user_data()
-            self.last_cache_update = now
+            now = time.monotonic()
+            for name, data in sections.items():
+                self._user_cache[name] = (data, now + _USER_CACHE_TTLS[name])
         
-        return self.user_data_cache
+        user_data = {}
+        for name in _USER_CACHE_TTLS:
+            user_data.update(self._user_cache[name][0])
+        return user_data
     
     async def close_bot(self):
         """Properly close the bot"""
@@ -398,8 +475,11 @@ class DiscordSelfBot(discord.Client):
             
             # Stop event processing
             if self.event_processor_task:
-                self.message_queue.stop_processing()
-                self.event_processor_task.cancel()
+                done = None
+                if await self.message_queue.stop_processing():
+                    done, _ = await asyncio.wait({self.event_processor_task}, timeout=1.0)
+                if not done:
+                    self.event_processor_task.cancel()
             
             # Mark session as not ready
             await self.session_manager.set_discord_ready(self.session_id, False)
@@ -1,46 +1,108 @@
 import json
 import os
+import re
 import shutil
 import asyncio
 import aiofiles
-from typing import Any, Dict, Optional
+import orjson
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 import logging
 
+# Upper bound on remembered filenames before the path caches are reset
+_PATH_CACHE_SIZE = 256
+
+# Backup file names, <name>_<YYYYmmdd>_<HHMMSS>.json
+_BACKUP_RE = re.compile(r'^(?P<name>.+)_(?P<date>\d{8})_(?P<time>\d{6})\.json$')
+
+# Backup paths per file stem, oldest first, per backup directory and shared by every JSONManager on it
+# backup_path -> (directory st_mtime_ns when scanned, index)
+_backup_indexes: Dict[str, Tuple[int, Dict[str, List[str]]]] = {}
+
 class JSONManager:
     def __init__(self, base_path="data/json"):
         self.base_path = base_path
         self.backup_path = "data/backups"
         self.logger = logging.getLogger(__name__)
         
+        # Resolved paths per filename, and the joined prefixes they are built from
+        self._base_prefix = os.path.join(self.base_path, "")
+        self._backup_prefix = os.path.join(self.backup_path, "")
+        self._file_path_cache: Dict[str, str] = {}
+        self._backup_stem_cache: Dict[str, str] = {}
+        
+        # Writes waiting behind an in-flight write of the same file, only the latest data is kept
+        self._pending_writes: Dict[str, Tuple[str, Any, bool, asyncio.Future]] = {}
+        self._active_writers: Dict[str, asyncio.Task] = {}
+        
+        # Newest data handed to write_json per file path until it is on disk, served by read_json
+        self._unwritten: Dict[str, Any] = {}
+        
         # Ensure directories exist
         os.makedirs(self.base_path, exist_ok=True)
         os.makedirs(self.backup_path, exist_ok=True)
     
     def _get_file_path(self, filename: str) -> str:
         """Get full file path"""
-        if not filename.endswith('.json'):
-            filename += '.json'
-        return os.path.join(self.base_path, filename)
+        file_path = self._file_path_cache.get(filename)
+        if file_path is None:
+            if len(self._file_path_cache) >= _PATH_CACHE_SIZE:
+                self._file_path_cache.clear()
+            name = filename if filename.endswith('.json') else filename + '.json'
+            file_path = self._file_path_cache[filename] = self._base_prefix + name
+        return file_path
+    
+    def _get_backup_stem(self, filename: str) -> str:
+        """Get backup path prefix shared by every backup of a file"""
+        stem_path = self._backup_stem_cache.get(filename)
+        if stem_path is None:
+            if len(self._backup_stem_cache) >= _PATH_CACHE_SIZE:
+                self._backup_stem_cache.clear()
+            name = filename if filename.endswith('.json') else filename + '.json'
+            stem_path = self._backup_stem_cache[filename] = self._backup_prefix + name.replace('.json', '')
+        return stem_path
     
     def _get_backup_path(self, filename: str) -> str:
         """Get backup file path with timestamp"""
-        if not filename.endswith('.json'):
-            filename += '.json'
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"{filename.replace('.json', '')}_{timestamp}.json"
-        return os.path.join(self.backup_path, backup_name)
+        return f"{self._get_backup_stem(filename)}_{timestamp}.json"
+    
+    def _get_backup_index(self) -> Dict[str, List[str]]:
+        """Get the backup index, rescanning the backup directory whenever it has changed"""
+        # Any process adding or removing a backup bumps the directory mtime
+        mtime = os.stat(self.backup_path).st_mtime_ns
+        cached = _backup_indexes.get(self.backup_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        index = defaultdict(list)
+        with os.scandir(self.backup_path) as entries:
+            for entry in entries:
+                match = _BACKUP_RE.match(entry.name)
+                if match:
+                    index[self._backup_prefix + match['name']].append(self._backup_prefix + entry.name)
+        
+        # Timestamps are fixed width, so name order is age order
+        for backups in index.values():
+            backups.sort()
+        _backup_indexes[self.backup_path] = (mtime, index)
+        return index
     
     async def read_json(self, filename: str, default: Any = None) -> Any:
         """Safely read JSON file with corruption handling"""
         file_path = self._get_file_path(filename)
         
+        # Data still queued or being written is newer than the file, round trip it so callers get a copy
+        if file_path in self._unwritten:
+            return orjson.loads(orjson.dumps(self._unwritten[file_path], option=orjson.OPT_NON_STR_KEYS))
+        
         if not os.path.exists(file_path):
             self.logger.info(f"File {filename} doesn't exist, returning default value")
             return default
         
         try:
-            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
+            async with aiofiles.open(file_path, 'rb') as f:
                 content = await f.read()
                 
             # Validate JSON before parsing
@@ -48,11 +110,11 @@ class JSONManager:
                 self.logger.warning(f"File {filename} is empty, returning default value")
                 return default
             
-            data = json.loads(content)
+            data = orjson.loads(content)
             self.logger.debug(f"Successfully read {filename}")
             return data
             
-        except json.JSONDecodeError as e:
+        except (json.JSONDecodeError, orjson.JSONDecodeError) as e:
             self.logger.error(f"JSON corruption detected in {filename}: {e}")
             
             # Try to restore from backup
@@ -69,7 +131,43 @@ class JSONManager:
             return default
     
     async def write_json(self, filename: str, data: Any, create_backup: bool = True) -> bool:
-        """Safely write JSON file with atomic operations"""
+        """Safely write JSON file, coalescing writes that arrive while the same file is being written"""
+        file_path = self._get_file_path(filename)
+        pending = self._pending_writes.get(file_path)
+        if pending is None:
+            future = asyncio.get_running_loop().create_future()
+        else:
+            future = pending[3]
+            create_backup = create_backup or pending[2]
+        self._pending_writes[file_path] = (filename, data, create_backup, future)
+        self._unwritten[file_path] = data
+        
+        # An idle file is written straight away, otherwise the running writer picks this up next
+        if file_path not in self._active_writers:
+            self._active_writers[file_path] = asyncio.create_task(self._drain_file_writes(file_path))
+        
+        # Shield so one cancelled caller doesn't fail the others sharing this write
+        return await asyncio.shield(future)
+    
+    async def _drain_file_writes(self, file_path: str):
+        """Write a file's pending data until no newer write is waiting"""
+        try:
+            while True:
+                pending = self._pending_writes.pop(file_path, None)
+                if pending is None:
+                    break
+                
+                filename, data, create_backup, future = pending
+                result = await self._write_json_now(filename, data, create_backup)
+                if self._unwritten.get(file_path) is data:
+                    del self._unwritten[file_path]
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._active_writers.pop(file_path, None)
+    
+    async def _write_json_now(self, filename: str, data: Any, create_backup: bool) -> bool:
+        """Write JSON file with atomic operations"""
         file_path = self._get_file_path(filename)
         temp_path = file_path + '.tmp'
         
@@ -79,17 +177,14 @@ class JSONManager:
                 await self._create_backup(filename)
             
             # Write to temporary file first
-            async with aiofiles.open(temp_path, 'w', encoding='utf-8') as f:
-                json_content = json.dumps(data, indent=2, ensure_ascii=False)
-                await f.write(json_content)
-            
-            # Verify the written file is valid JSON
-            async with aiofiles.open(temp_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                json.loads(content)  # Validate JSON
+            payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+            async with aiofiles.open(temp_path, 'wb') as f:
+                await f.write(payload)
+                await f.flush()
+                await asyncio.to_thread(os.fsync, f.fileno())
             
             # Atomic move
-            shutil.move(temp_path, file_path)
+            os.replace(temp_path, file_path)
             self.logger.debug(f"Successfully wrote {filename}")
             return True
             
@@ -107,7 +202,7 @@ class JSONManager:
         current_data = await self.read_json(filename, {})
         
         if merge and isinstance(current_data, dict) and isinstance(updates, dict):
-            # Deep merge dictionaries
+            # Deep merge dictionaries, current_data is a fresh read so merging in place is safe
             merged_data = self._deep_merge(current_data, updates)
             return await self.write_json(filename, merged_data)
         else:
@@ -115,16 +210,18 @@ class JSONManager:
             return await self.write_json(filename, updates)
     
     def _deep_merge(self, base: dict, updates: dict) -> dict:
-        """Deep merge two dictionaries"""
-        result = base.copy()
+        """Deep merge updates into base in place and return base"""
+        stack = [(base, updates)]
+        while stack:
+            base_dict, update_dict = stack.pop()
+            for key, value in update_dict.items():
+                current = base_dict.get(key)
+                if isinstance(value, dict) and isinstance(current, dict):
+                    stack.append((current, value))
+                else:
+                    base_dict[key] = value
         
-        for key, value in updates.items():
-            if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-                result[key] = self._deep_merge(result[key], value)
-            else:
-                result[key] = value
-        
-        return result
+        return base
     
     async def _create_backup(self, filename: str) -> bool:
         """Create backup of existing file"""
@@ -133,7 +230,16 @@ class JSONManager:
         
         try:
             if os.path.exists(file_path):
-                shutil.copy2(file_path, backup_path)
+                # Hardlink when possible, the live file is only ever replaced, never written in place
+                try:
+                    os.link(file_path, backup_path)
+                except FileExistsError:
+                    # Already linked within the same second, otherwise refresh the older copy
+                    if not os.path.samefile(file_path, backup_path):
+                        shutil.copy2(file_path, backup_path)
+                except OSError:
+                    shutil.copy2(file_path, backup_path)
+                
                 self.logger.debug(f"Created backup: {backup_path}")
                 return True
         except Exception as e:
@@ -145,22 +251,16 @@ class JSONManager:
         """Try to restore from the most recent backup"""
         try:
             # Find most recent backup
-            backup_files = []
-            for f in os.listdir(self.backup_path):
-                if f.startswith(filename.replace('.json', '')) and f.endswith('.json'):
-                    backup_files.append(f)
-            
-            if not backup_files:
+            backups = self._get_backup_index().get(self._get_backup_stem(filename))
+            if not backups:
                 return None
             
-            # Sort by timestamp (newest first)
-            backup_files.sort(reverse=True)
-            latest_backup = os.path.join(self.backup_path, backup_files[0])
+            latest_backup = backups[-1]
             
             # Try to read the backup
-            async with aiofiles.open(latest_backup, 'r', encoding='utf-8') as f:
+            async with aiofiles.open(latest_backup, 'rb') as f:
                 content = await f.read()
-                data = json.loads(content)
+                data = orjson.loads(content)
             
             # Restore the backup to main file
             await self.write_json(filename, data, create_backup=False)
@@ -202,28 +302,18 @@ class JSONManager:
     async def cleanup_old_backups(self, max_backups: int = 10):
         """Clean up old backup files, keeping only the most recent ones"""
         try:
-            backup_files = {}
-            
-            # Group backups by original filename
-            for f in os.listdir(self.backup_path):
-                if f.endswith('.json'):
-                    # Extract original filename
-                    parts = f.split('_')
-                    if len(parts) >= 3:  # filename_date_time.json
-                        original = '_'.join(parts[:-2]) + '.json'
-                        if original not in backup_files:
-                            backup_files[original] = []
-                        backup_files[original].append(f)
-            
-            # Clean up each group
-            for original, backups in backup_files.items():
-                backups.sort(reverse=True)  # Newest first
+            for backups in self._get_backup_index().values():
+                excess = len(backups) - max_backups
+                if excess <= 0:
+                    continue
                 
-                # Remove old backups
-                for old_backup in backups[max_backups:]:
-                    old_path = os.path.join(self.backup_path, old_backup)
-                    os.remove(old_path)
-                    self.logger.debug(f"Removed old backup: {old_backup}")
+                # Remove old backups, oldest first
+                for old_path in backups[:excess]:
+                    try:
+                        os.remove(old_path)
+                    except FileNotFoundError:
+                        pass
+                    self.logger.debug(f"Removed old backup: {old_path}")
             
         except Exception as e:
             self.logger.error(f"Error cleaning up backups: {e}")
\ No newline at end of file
@@ -1,11 +1,131 @@
 import logging
 import logging.handlers
+import mmap
 import os
+import queue
 import sys
-from datetime import datetime
-from typing import Optional
+import time
+from typing import Dict, Optional
 import asyncio
-import aiofiles
+import orjson
+
+# Pending lines per event log file, events beyond this are dropped rather than blocking the caller
+_EVENT_QUEUE_SIZE = 8192
+
+# Block size used when reading log files backwards from the end
+_TAIL_BLOCK_SIZE = 64 * 1024
+
+# Files larger than this are tailed through mmap instead of block reads
+_TAIL_MMAP_THRESHOLD = 1 << 20
+
+def _read_tail_lines(path: str, lines: int) -> list:
+    """Return the last lines of a file, scanning backwards from EOF"""
+    if lines <= 0:
+        return []
+    
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        end = os.fstat(fd).st_size
+        if end > _TAIL_MMAP_THRESHOLD:
+            data = _read_tail_mmap(fd, end, lines)
+        else:
+            data = _read_tail_blocks(fd, end, lines)
+    finally:
+        os.close(fd)
+    
+    return data.decode('utf-8', errors='replace').splitlines(keepends=True)[-lines:]
+
+def _read_tail_blocks(fd: int, end: int, lines: int) -> bytes:
+    """Read fixed-size blocks backwards until the tail holds enough lines"""
+    pos = end
+    chunks = []
+    newlines = 0
+    
+    # One newline more than requested guarantees the first returned line is complete
+    while pos > 0 and newlines <= lines:
+        start = max(0, pos - _TAIL_BLOCK_SIZE)
+        block = os.pread(fd, pos - start, start)
+        newlines += block.count(b"\n")
+        chunks.append(block)
+        pos = start
+    
+    chunks.reverse()
+    return b"".join(chunks)
+
+def _read_tail_mmap(fd: int, end: int, lines: int) -> bytes:
+    """Find the tail with rfind over a read-only mapping, only its pages are touched"""
+    with mmap.mmap(fd, end, access=mmap.ACCESS_READ) as mm:
+        pos = end
+        for _ in range(lines + 1):
+            pos = mm.rfind(b"\n", 0, pos)
+            if pos < 0:
+                break
+        return mm[pos + 1:end]
+
+_iso_prefix_cache: tuple = (None, b'')
+
+def _fast_iso_bytes() -> bytes:
+    """Current local time as ISO 8601 bytes, formatting the seconds part once per second"""
+    global _iso_prefix_cache
+    second, nanoseconds = divmod(time.time_ns(), 1_000_000_000)
+    cached_second, prefix = _iso_prefix_cache
+    if second != cached_second:
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S.', time.localtime(second)).encode()
+        _iso_prefix_cache = (second, prefix)
+    return prefix + b'%06d' % (nanoseconds // 1000)
+
+# Flush a batch once it reaches this many bytes even if more lines are queued
+_EVENT_BATCH_BYTES = 64 * 1024
+
+# Background listeners writing the rotating log files, one per logger name
+_file_listeners: Dict[str, logging.handlers.QueueListener] = {}
+
+# Console handler installed by the latest setup, one per logger name
+_console_handlers: Dict[str, logging.Handler] = {}
+
+class FastFormatter(logging.Formatter):
+    """Formatter for the fixed 'time | level | [name:line |] message' layout
+    
+    Produces the same text as the equivalent %-style format string, but formats
+    the timestamp once per second and builds each line with a single f-string.
+    The last record's text is kept, so handlers sharing the formatter on one
+    thread (and RotatingFileHandler's own rollover check) reuse it.
+    """
+    
+    def __init__(self, datefmt: str, with_location: bool = True):
+        super().__init__(datefmt=datefmt)
+        self.with_location = with_location
+        self._time_cache: tuple = (None, '')
+        self._last_record: Optional[logging.LogRecord] = None
+        self._last_line = ''
+    
+    def format(self, record: logging.LogRecord) -> str:
+        if record is self._last_record:
+            return self._last_line
+        
+        second = int(record.created)
+        cached_second, asctime = self._time_cache
+        if second != cached_second:
+            asctime = time.strftime(self.datefmt, time.localtime(second))
+            self._time_cache = (second, asctime)
+        
+        record.message = record.getMessage()
+        if self.with_location:
+            line = f"{asctime} | {record.levelname:<8} | {record.name}:{record.lineno} | {record.message}"
+        else:
+            line = f"{asctime} | {record.levelname:<8} | {record.message}"
+        
+        # Tracebacks and stack info are appended exactly as logging.Formatter does
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line = f"{line}\n{record.exc_text}"
+        if record.stack_info:
+            line = f"{line}\n{self.formatStack(record.stack_info)}"
+        
+        self._last_record = record
+        self._last_line = line
+        return line
 
 class CustomLogger:
     def __init__(self, name: str = "DiscordSelfBot", log_dir: str = "data/logs"):
@@ -14,9 +134,22 @@ class CustomLogger:
         self.logger = None
         self.debug_mode = False
         
+        # Event log lines are queued per file and appended in batches by one flusher task each
+        self._event_queues: Dict[str, asyncio.Queue] = {}
+        self._event_flushers: Dict[str, asyncio.Task] = {}
+        self.dropped_events = 0
+        
         # Ensure log directory exists
         os.makedirs(log_dir, exist_ok=True)
         
+        # Paths of every log file this logger writes, by log type
+        self._log_paths = {
+            "main": os.path.join(log_dir, f"{name.lower()}.log"),
+            "errors": os.path.join(log_dir, f"{name.lower()}_errors.log"),
+            "discord": os.path.join(log_dir, "discord_events.log"),
+            "websocket": os.path.join(log_dir, "websocket.log")
+        }
+        
         self.setup_logger()
     
     def setup_logger(self, level: str = "INFO"):
@@ -24,22 +157,20 @@ class CustomLogger:
         self.logger = logging.getLogger(self.name)
         self.logger.setLevel(getattr(logging, level.upper()))
         
-        # Clear existing handlers
+        # Clear existing handlers, and stop the file writer thread of any previous setup
         self.logger.handlers.clear()
+        previous_listener = _file_listeners.pop(self.name, None)
+        if previous_listener is not None:
+            previous_listener.stop()
+            for handler in previous_listener.handlers:
+                handler.close()
         
         # Create formatters
-        detailed_formatter = logging.Formatter(
-            '%(asctime)s | %(levelname)-8s | %(name)s:%(lineno)d | %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        
-        simple_formatter = logging.Formatter(
-            '%(asctime)s | %(levelname)-8s | %(message)s',
-            datefmt='%H:%M:%S'
-        )
+        detailed_formatter = FastFormatter(datefmt='%Y-%m-%d %H:%M:%S')
+        simple_formatter = FastFormatter(datefmt='%H:%M:%S', with_location=False)
         
         # File handler with rotation
-        log_file = os.path.join(self.log_dir, f"{self.name.lower()}.log")
+        log_file = self._log_paths["main"]
         file_handler = logging.handlers.RotatingFileHandler(
             log_file,
             maxBytes=10*1024*1024,  # 10MB
@@ -53,9 +184,10 @@ class CustomLogger:
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(logging.INFO)
         console_handler.setFormatter(simple_formatter)
+        _console_handlers[self.name] = console_handler
         
         # Error file handler
-        error_file = os.path.join(self.log_dir, f"{self.name.lower()}_errors.log")
+        error_file = self._log_paths["errors"]
         error_handler = logging.handlers.RotatingFileHandler(
             error_file,
             maxBytes=5*1024*1024,  # 5MB
@@ -65,10 +197,18 @@ class CustomLogger:
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(detailed_formatter)
         
+        # File handlers run on a background thread fed by a queue, so logging calls never wait on disk.
+        # Both share detailed_formatter on that thread, so an error record is formatted once for both files.
+        record_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(
+            record_queue, file_handler, error_handler, respect_handler_level=True
+        )
+        listener.start()
+        _file_listeners[self.name] = listener
+        
         # Add handlers
-        self.logger.addHandler(file_handler)
+        self.logger.addHandler(logging.handlers.QueueHandler(record_queue))
         self.logger.addHandler(console_handler)
-        self.logger.addHandler(error_handler)
         
         # Log startup
         self.logger.info(f"Logger initialized for {self.name}")
@@ -77,76 +217,138 @@ class CustomLogger:
         """Enable/disable debug mode"""
         self.debug_mode = enabled
         
-        if enabled:
-            self.logger.setLevel(logging.DEBUG)
-            # Update console handler to show debug messages
-            for handler in self.logger.handlers:
-                if isinstance(handler, logging.StreamHandler) and handler.stream == sys.stdout:
-                    handler.setLevel(logging.DEBUG)
-            self.logger.debug("Debug mode enabled")
-        else:
-            self.logger.setLevel(logging.INFO)
-            # Reset console handler to INFO level
-            for handler in self.logger.handlers:
-                if isinstance(handler, logging.StreamHandler) and handler.stream == sys.stdout:
-                    handler.setLevel(logging.INFO)
-            self.logger.info("Debug mode disabled")
-    
-    def debug(self, message: str, **kwargs):
+        # Logger and console handler move together, debug messages reach stdout only in debug mode
+        level = logging.DEBUG if enabled else logging.INFO
+        self.logger.setLevel(level)
+        _console_handlers[self.name].setLevel(level)
+        self.logger.log(level, f"Debug mode {'enabled' if enabled else 'disabled'}")
+    
+    # Filtered-out levels return after one level check, before logging builds anything
+    def debug(self, message: str, *args, **kwargs):
         """Log debug message"""
-        self.logger.debug(message, **kwargs)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(message, *args, **kwargs)
     
-    def info(self, message: str, **kwargs):
+    def info(self, message: str, *args, **kwargs):
         """Log info message"""
-        self.logger.info(message, **kwargs)
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(message, *args, **kwargs)
     
-    def warning(self, message: str, **kwargs):
+    def warning(self, message: str, *args, **kwargs):
         """Log warning message"""
-        self.logger.warning(message, **kwargs)
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning(message, *args, **kwargs)
     
-    def error(self, message: str, exc_info: bool = False, **kwargs):
+    def error(self, message: str, *args, exc_info: bool = False, **kwargs):
         """Log error message"""
-        self.logger.error(message, exc_info=exc_info, **kwargs)
+        self.logger.error(message, *args, exc_info=exc_info, **kwargs)
     
-    def critical(self, message: str, exc_info: bool = True, **kwargs):
+    def critical(self, message: str, *args, exc_info: bool = True, **kwargs):
         """Log critical message"""
-        self.logger.critical(message, exc_info=exc_info, **kwargs)
+        self.logger.critical(message, *args, exc_info=exc_info, **kwargs)
     
-    def exception(self, message: str, **kwargs):
+    def exception(self, message: str, *args, **kwargs):
         """Log exception with traceback"""
-        self.logger.exception(message, **kwargs)
+        self.logger.exception(message, *args, **kwargs)
     
     async def log_discord_event(self, event_type: str, data: dict):
-        """Log Discord events to separate file"""
-        event_file = os.path.join(self.log_dir, "discord_events.log")
+        """Log Discord events to separate file, one JSON object per line"""
+        event_file = self._log_paths["discord"]
         
         try:
-            timestamp = datetime.now().isoformat()
-            log_entry = {
-                "timestamp": timestamp,
-                "event_type": event_type,
-                "data": data
-            }
-            
-            async with aiofiles.open(event_file, 'a', encoding='utf-8') as f:
-                await f.write(f"{timestamp} | {event_type} | {data}\n")
+            self._enqueue_event_line(event_file, orjson.dumps(
+                {"ts": _fast_iso_bytes().decode(), "type": event_type, "data": data},
+                default=str,
+                option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS
+            ))
                 
         except Exception as e:
             self.logger.error(f"Failed to log Discord event: {e}")
     
     async def log_websocket_event(self, event_type: str, message: str):
         """Log WebSocket events"""
-        ws_file = os.path.join(self.log_dir, "websocket.log")
+        ws_file = self._log_paths["websocket"]
         
         try:
-            timestamp = datetime.now().isoformat()
-            
-            async with aiofiles.open(ws_file, 'a', encoding='utf-8') as f:
-                await f.write(f"{timestamp} | {event_type} | {message}\n")
+            self._enqueue_event_line(ws_file, b" | ".join([
+                _fast_iso_bytes(), event_type.encode(), str(message).encode()
+            ]) + b"\n")
                 
         except Exception as e:
             self.logger.error(f"Failed to log WebSocket event: {e}")
     
+    def _enqueue_event_line(self, path: str, line: bytes):
+        """Queue a line for the file's flusher, starting it on first use"""
+        line_queue = self._event_queues.get(path)
+        if line_queue is None or self._event_flushers[path].done():
+            line_queue = self._event_queues[path] = asyncio.Queue(maxsize=_EVENT_QUEUE_SIZE)
+            self._event_flushers[path] = asyncio.create_task(self._flush_event_lines(path, line_queue))
+        
+        try:
+            line_queue.put_nowait(line)
+        except asyncio.QueueFull:
+            self.dropped_events += 1
+    
+    async def _flush_event_lines(self, path: str, line_queue: asyncio.Queue):
+        """Append queued lines to path, one write per batch, until a None sentinel arrives
+        
+        Batches are bounded by _EVENT_BATCH_BYTES and appended to the page cache with
+        a plain os.write on an O_APPEND descriptor, which is cheaper than handing each
+        batch to a worker thread.
+        """
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            running = True
+            while running:
+                line = await line_queue.get()
+                if line is None:
+                    break
+                
+                # Take whatever else is already queued, up to the batch size
+                batch = [line]
+                size = len(line)
+                while size < _EVENT_BATCH_BYTES:
+                    try:
+                        line = line_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        break
+                    if line is None:
+                        running = False
+                        break
+                    batch.append(line)
+                    size += len(line)
+                
+                try:
+                    data = memoryview(b"".join(batch))
+                    while data:
+                        data = data[os.write(fd, data):]
+                except Exception as e:
+                    self.logger.error(f"Failed to write event log {path}: {e}")
+        finally:
+            os.close(fd)
+    
+    def stop_file_logging(self):
+        """Write out queued records and stop the rotating file writer thread"""
+        listener = _file_listeners.pop(self.name, None)
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+    
+    async def close_event_logs(self):
+        """Write out queued event log lines and stop the flusher tasks"""
+        for path, line_queue in self._event_queues.items():
+            try:
+                line_queue.put_nowait(None)
+            except asyncio.QueueFull:
+                # Never wait for room, a dead flusher leaves a full queue that never drains
+                self._event_flushers[path].cancel()
+        if self._event_flushers:
+            await asyncio.gather(*self._event_flushers.values(), return_exceptions=True)
+        
+        self._event_queues.clear()
+        self._event_flushers.clear()
+    
     def log_token_operation(self, operation: str, token_name: str, success: bool):
         """Log token operations (without exposing actual tokens)"""
         status = "SUCCESS" if success else "FAILED"
@@ -171,25 +373,14 @@ class CustomLogger:
     
     async def get_recent_logs(self, lines: int = 100, log_type: str = "main") -> list:
         """Get recent log entries"""
-        log_files = {
-            "main": f"{self.name.lower()}.log",
-            "errors": f"{self.name.lower()}_errors.log",
-            "discord": "discord_events.log",
-            "websocket": "websocket.log"
-        }
-        
-        if log_type not in log_files:
-            return []
-        
-        log_file = os.path.join(self.log_dir, log_files[log_type])
-        
-        if not os.path.exists(log_file):
+        log_file = self._log_paths.get(log_type)
+        if log_file is None:
             return []
         
         try:
-            async with aiofiles.open(log_file, 'r', encoding='utf-8') as f:
-                all_lines = await f.readlines()
-                return all_lines[-lines:] if len(all_lines) > lines else all_lines
+            return await asyncio.to_thread(_read_tail_lines, log_file, lines)
+        except FileNotFoundError:
+            return []
         except Exception as e:
             self.logger.error(f"Failed to read log file: {e}")
             return []
@@ -197,19 +388,18 @@ class CustomLogger:
     def cleanup_old_logs(self, days: int = 30):
         """Clean up log files older than specified days"""
         try:
-            import time
             current_time = time.time()
             cutoff_time = current_time - (days * 24 * 60 * 60)
             
-            for filename in os.listdir(self.log_dir):
-                file_path = os.path.join(self.log_dir, filename)
-                
-                if os.path.isfile(file_path):
-                    file_time = os.path.getmtime(file_path)
+            # DirEntry caches the file type from the directory read, so only stat() hits the disk
+            with os.scandir(self.log_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
                     
-                    if file_time < cutoff_time:
-                        os.remove(file_path)
-                        self.logger.info(f"Removed old log file: {filename}")
+                    if entry.stat(follow_symlinks=False).st_mtime < cutoff_time:
+                        os.remove(entry.path)
+                        self.logger.info(f"Removed old log file: {entry.name}")
                         
         except Exception as e:
             self.logger.error(f"Failed to cleanup old logs: {e}")
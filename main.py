@@ -1,16 +1,19 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import uvicorn
-import json
+import orjson
+import hashlib
 import asyncio
-import subprocess
+import logging
 import os
 import signal
 import sys
+import threading
+import time
 import psutil
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from session_manager import SessionManager
 from logger import CustomLogger
 from token_manager import TokenManager
@@ -19,21 +22,90 @@ from test_framework import TestFramework
 from config_manager import ConfigManager
 
 # Global variables
-bot_processes: Dict[str, subprocess.Popen] = {}
+bot_processes: Dict[str, asyncio.subprocess.Process] = {}
+
+# Append-only view of bot_processes for the signal handler; stopped entries become None until compacted
+_processes_list: List[Optional[Tuple[str, asyncio.subprocess.Process]]] = []
+_processes_lock = threading.Lock()
 bot_process_instance: Optional[BotProcess] = None
 session_manager = SessionManager()
 logger = CustomLogger()
 token_manager = TokenManager()
 config_manager = ConfigManager()
 
-async def session_cleanup_task():
-    """Background task to clean up expired sessions"""
-    while True:
+def _dumps_text(payload) -> str:
+    """Serialize a WebSocket payload with orjson, sent as a text frame since browser clients JSON.parse it"""
+    return orjson.dumps(payload).decode('utf-8')
+
+# Largest inbound WebSocket frame accepted; commands are small and every frame is parsed in full
+_WS_MAX_SIZE = 1 << 20
+
+async def _receive_json(websocket: WebSocket):
+    """Receive one JSON message from a text or binary frame, parsed straight from the frame payload"""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    
+    # Binary frames reach us undecoded, so orjson's own UTF-8 check is the only one they pay;
+    # text frames were already decoded and validated by the server
+    data = message.get("bytes")
+    if data is None:
+        data = message.get("text")
+    
+    # Enforced here as well as in uvicorn.run, so the cap holds however the app is served
+    if data is not None and len(data) > _WS_MAX_SIZE:
+        await websocket.close(code=1009)  # Message too big
+        raise WebSocketDisconnect(1009)
+    return orjson.loads(data)
+
+# Fixed WebSocket frames, serialized once at import
+_WS_NO_BOT = _dumps_text({"type": "error", "message": "Bot process not initialized"})
+_WS_INVALID_JSON = _dumps_text({"type": "error", "message": "Invalid JSON format"})
+_WS_INTERNAL_ERROR = _dumps_text({"type": "error", "message": "Internal server error"})
+_WS_TESTS_STOPPED = _dumps_text({"type": "test_stopped", "message": "Tests stopped by user request"})
+
+# Fixed REST response bodies, serialized once at import
+_HEALTH_JSON = orjson.dumps({"status": "healthy", "service": "gilf", "version": "1.0.0"})
+_NO_BOT_JSON = orjson.dumps({"error": "Bot process not initialized"})
+_BOT_STOPPED_JSON = orjson.dumps({"message": "Bot stopped successfully"})
+_TOKEN_SAVED_JSON = orjson.dumps({"message": "Token saved successfully"})
+_TOKEN_CLEARED_JSON = orjson.dumps({"message": "Token cleared successfully"})
+
+def _json_bytes_response(body: bytes) -> Response:
+    """Wrap a pre-serialized JSON body in a response"""
+    return Response(content=body, media_type="application/json")
+
+# HTML pages served from memory, read once at startup: name -> (body, ETag)
+_PAGE_FILES = ("index.html", "login.html", "test_dashboard.html")
+_PAGE_CACHE_CONTROL = "public, max-age=60"
+_pages: Dict[str, Tuple[bytes, str]] = {}
+
+def _load_pages():
+    """Read the HTML pages into memory and compute their ETags"""
+    for name in _PAGE_FILES:
         try:
-            await asyncio.sleep(300)  # Run every 5 minutes
-            await session_manager.cleanup_expired_sessions()
-        except Exception as e:
-            logger.error(f"Error in session cleanup task: {e}")
+            with open(os.path.join("templates", name), "rb") as f:
+                body = f.read()
+        except FileNotFoundError:
+            logger.warning("Page %s not found, it will return 404", name)
+            continue
+        _pages[name] = (body, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"')
+
+def _page_response(request: Request, name: str, missing_detail: str) -> Response:
+    """Serve a cached page, answering 304 when the client already holds this version"""
+    page = _pages.get(name)
+    if page is None:
+        raise HTTPException(status_code=404, detail=missing_detail)
+    
+    body, etag = page
+    headers = {"ETag": etag, "Cache-Control": _PAGE_CACHE_CONTROL}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="text/html", headers=headers)
+
+async def session_cleanup_task():
+    """Background task to clean up expired sessions as they expire"""
+    await session_manager.run_expiry_scheduler()
 
 async def auto_start_bot():
     """Auto-start bot if configured"""
@@ -47,9 +119,9 @@ async def auto_start_bot():
             if success:
                 logger.info("Bot auto-started successfully")
             else:
-                logger.error(f"Failed to auto-start bot: {message}")
+                logger.error("Failed to auto-start bot: %s", message)
     except Exception as e:
-        logger.error(f"Error in auto-start: {e}")
+        logger.error("Error in auto-start: %s", e)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -59,6 +131,9 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting gilf...")
     
+    # Cache the HTML pages so serving them never touches the disk
+    _load_pages()
+    
     # Load configuration
     await config_manager.load_config()
     
@@ -83,18 +158,27 @@ async def lifespan(app: FastAPI):
     except asyncio.CancelledError:
         pass
     
-    # Stop all bot processes
-    for process_id, process in bot_processes.items():
-        try:
-            if process.poll() is None:  # Process is still running
-                process.terminate()
-                process.wait(timeout=5)
-        except Exception as e:
-            logger.error(f"Error stopping bot process {process_id}: {e}")
+    # Stop all bot processes concurrently
+    with _processes_lock:
+        stopping = list(bot_processes.items())
+        bot_processes.clear()
+        _processes_list.clear()
+    await asyncio.gather(
+        *(_stop_process(process_id, process, timeout=5) for process_id, process in stopping),
+        return_exceptions=True
+    )
     
     # Stop in-process bot
     if bot_process_instance:
         await bot_process_instance.stop_bot()
+        await bot_process_instance.logger.close_event_logs()
+    
+    # Write any pending configuration changes
+    await config_manager.flush()
+    
+    # Write out queued event log lines and log records
+    await logger.close_event_logs()
+    logger.stop_file_logging()
 
 app = FastAPI(title="gilf", version="1.0.0", lifespan=lifespan)
 
@@ -105,40 +189,32 @@ if os.path.exists("templates"):
     app.mount("/templates", StaticFiles(directory="templates"), name="templates")
 
 @app.get("/login")
-async def login_page():
+async def login_page(request: Request):
     """Serve the login page"""
     try:
-        login_path = os.path.join("templates", "login.html")
-        if os.path.exists(login_path):
-            return FileResponse(login_path)
-        else:
-            raise HTTPException(status_code=404, detail="Login page not found")
+        return _page_response(request, "login.html", "Login page not found")
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error serving login page: {e}")
+        logger.error("Error serving login page: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/")
-async def read_root():
+async def read_root(request: Request):
     """Serve the main page"""
     try:
-        # Serve the enhanced index.html
-        index_path = os.path.join("templates", "index.html")
-        if os.path.exists(index_path):
-            return FileResponse(index_path)
-        else:
-            raise HTTPException(status_code=404, detail="Index page not found")
+        # Serve the enhanced index.html, cached at startup
+        return _page_response(request, "index.html", "Index page not found")
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error serving index page: {e}")
+        logger.error("Error serving index page: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
-    return JSONResponse({
-        "status": "healthy",
-        "service": "gilf",
-        "version": "1.0.0"
-    })
+    return _json_bytes_response(_HEALTH_JSON)
 
 @app.get("/api/bot/status")
 async def get_bot_status():
@@ -148,9 +224,9 @@ async def get_bot_status():
             status = await bot_process_instance.get_bot_status()
             return JSONResponse(status)
         else:
-            return JSONResponse({"error": "Bot process not initialized"})
+            return _json_bytes_response(_NO_BOT_JSON)
     except Exception as e:
-        logger.error(f"Error getting bot status: {e}")
+        logger.error("Error getting bot status: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.websocket("/ws")
@@ -165,10 +241,10 @@ async def websocket_endpoint(websocket: WebSocket):
         session_id = await session_manager.create_session()
         await session_manager.add_websocket_to_session(session_id, websocket)
         
-        logger.info(f"WebSocket connected: {session_id}")
+        logger.info("WebSocket connected: %s", session_id)
         
         # Send welcome message
-        await websocket.send_text(json.dumps({
+        await websocket.send_text(_dumps_text({
             "type": "connected",
             "session_id": session_id,
             "message": "Connected to gilf"
@@ -176,34 +252,24 @@ async def websocket_endpoint(websocket: WebSocket):
         
         while True:
             try:
-                data = await websocket.receive_text()
-                message = json.loads(data)
+                message = await _receive_json(websocket)
                 
                 # Handle message through bot process
                 if bot_process_instance:
                     await bot_process_instance.handle_websocket_message(message, session_id)
                 else:
-                    await websocket.send_text(json.dumps({
-                        "type": "error",
-                        "message": "Bot process not initialized"
-                    }))
+                    await websocket.send_text(_WS_NO_BOT)
                     
-            except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({
-                    "type": "error",
-                    "message": "Invalid JSON format"
-                }))
+            except orjson.JSONDecodeError:
+                await websocket.send_text(_WS_INVALID_JSON)
             except Exception as e:
-                logger.error(f"Error processing WebSocket message: {e}")
-                await websocket.send_text(json.dumps({
-                    "type": "error",
-                    "message": "Internal server error"
-                }))
+                logger.error("Error processing WebSocket message: %s", e)
+                await websocket.send_text(_WS_INTERNAL_ERROR)
                 
     except WebSocketDisconnect:
-        logger.info(f"WebSocket disconnected: {session_id}")
+        logger.info("WebSocket disconnected: %s", session_id)
     except Exception as e:
-        logger.error(f"WebSocket error: {e}")
+        logger.error("WebSocket error: %s", e)
     finally:
         # Clean up session
         if session_id:
@@ -241,7 +307,7 @@ async def start_bot_api(request: dict = None):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error starting bot via API: {e}")
+        logger.error("Error starting bot via API: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/api/bot/stop")
@@ -250,12 +316,12 @@ async def stop_bot_api():
     try:
         if bot_process_instance:
             await bot_process_instance.stop_bot()
-            return JSONResponse({"message": "Bot stopped successfully"})
+            return _json_bytes_response(_BOT_STOPPED_JSON)
         else:
             raise HTTPException(status_code=500, detail="Bot process not initialized")
             
     except Exception as e:
-        logger.error(f"Error stopping bot via API: {e}")
+        logger.error("Error stopping bot via API: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # Configuration API endpoints
@@ -264,13 +330,13 @@ async def get_config():
     """Get current configuration"""
     try:
         config = config_manager.get_config()
-        # Remove sensitive data from response
+        # Remove sensitive data from response, copying the section so the stored token is untouched
         safe_config = config.copy()
         if "discord" in safe_config and "token" in safe_config["discord"]:
-            safe_config["discord"]["token"] = "***" if safe_config["discord"]["token"] else ""
+            safe_config["discord"] = {**safe_config["discord"], "token": "***" if safe_config["discord"]["token"] else ""}
         return JSONResponse(safe_config)
     except Exception as e:
-        logger.error(f"Error getting config: {e}")
+        logger.error("Error getting config: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/api/config/token")
@@ -290,11 +356,11 @@ async def set_token(request: dict):
         await config_manager.set_discord_token(token)
         await config_manager.set_auto_start(auto_start)
         
-        return JSONResponse({"message": "Token saved successfully"})
+        return _json_bytes_response(_TOKEN_SAVED_JSON)
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error setting token: {e}")
+        logger.error("Error setting token: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/api/config/auto-start")
@@ -305,7 +371,7 @@ async def set_auto_start(request: dict):
         await config_manager.set_auto_start(enabled)
         return JSONResponse({"message": f"Auto-start {'enabled' if enabled else 'disabled'}"})
     except Exception as e:
-        logger.error(f"Error setting auto-start: {e}")
+        logger.error("Error setting auto-start: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/api/config/feature")
@@ -323,7 +389,7 @@ async def set_feature_config(request: dict):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error setting feature config: {e}")
+        logger.error("Error setting feature config: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.delete("/api/config/token")
@@ -334,12 +400,12 @@ async def clear_token():
         # Stop bot if running
         if bot_process_instance:
             await bot_process_instance.stop_bot()
-        return JSONResponse({"message": "Token cleared successfully"})
+        return _json_bytes_response(_TOKEN_CLEARED_JSON)
     except Exception as e:
-        logger.error(f"Error clearing token: {e}")
+        logger.error("Error clearing token: %s", e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
-def start_separate_bot_process(token: str, session_id: str = None) -> str:
+async def start_separate_bot_process(token: str, session_id: str = None) -> str:
     """Start bot in a separate process"""
     try:
         import uuid
@@ -350,48 +416,98 @@ def start_separate_bot_process(token: str, session_id: str = None) -> str:
         if session_id:
             cmd.append(session_id)
         
-        # Start process
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            cwd=os.getcwd()
-        )
+        # Child output goes straight to its own log files; nothing reads pipes, which would fill and block it
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        out_fd = os.open(os.path.join(logger.log_dir, f"bot_{process_id}.out.log"), flags, 0o644)
+        try:
+            err_fd = os.open(os.path.join(logger.log_dir, f"bot_{process_id}.err.log"), flags, 0o644)
+            try:
+                # Start process
+                process = await asyncio.create_subprocess_exec(
+                    *cmd,
+                    stdout=out_fd,
+                    stderr=err_fd,
+                    cwd=os.getcwd(),
+                    start_new_session=True  # Own process group, so shutdown can signal the whole tree
+                )
+            finally:
+                os.close(err_fd)  # The child holds its own copies
+        finally:
+            os.close(out_fd)
         
-        bot_processes[process_id] = process
-        logger.info(f"Started bot process {process_id} with PID {process.pid}")
+        with _processes_lock:
+            bot_processes[process_id] = process
+            _processes_list.append((process_id, process))
+        logger.info("Started bot process %s with PID %s", process_id, process.pid)
         
         return process_id
         
     except Exception as e:
-        logger.error(f"Failed to start separate bot process: {e}")
+        logger.error("Failed to start separate bot process: %s", e)
         raise
 
-def stop_bot_process(process_id: str) -> bool:
-    """Stop a specific bot process"""
+def _signal_process_group(process: asyncio.subprocess.Process, force: bool = False):
+    """Terminate or kill a bot process together with anything it started"""
     try:
-        if process_id not in bot_processes:
-            return False
-        
-        process = bot_processes[process_id]
-        
-        if process.poll() is None:  # Process is still running
-            # Try graceful shutdown first
+        if hasattr(os, "killpg"):
+            # Started with start_new_session, so its process group id is its pid
+            os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+        elif force:
+            process.kill()
+        else:
             process.terminate()
+    except ProcessLookupError:
+        pass  # Already gone
+
+async def _stop_process(process_id: str, process: asyncio.subprocess.Process, timeout: float):
+    """Terminate a bot process, killing it if it has not exited within timeout"""
+    try:
+        if process.returncode is None:  # Process is still running
+            # Try graceful shutdown first
+            _signal_process_group(process)
             
             try:
-                process.wait(timeout=10)
-            except subprocess.TimeoutExpired:
+                await asyncio.wait_for(process.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
                 # Force kill if graceful shutdown fails
-                process.kill()
-                process.wait()
+                logger.warning("Force killing bot process %s", process_id)
+                _signal_process_group(process, force=True)
+                await process.wait()
+    except ProcessLookupError:
+        pass  # Exited between the returncode check and the signal
+    except Exception as e:
+        logger.error("Error stopping bot process %s: %s", process_id, e)
+
+def _release_process_slot(process_id: str) -> Optional[asyncio.subprocess.Process]:
+    """Remove a bot process from the registry, leaving a None in its list slot"""
+    with _processes_lock:
+        process = bot_processes.pop(process_id, None)
+        if process is None:
+            return None
         
-        del bot_processes[process_id]
-        logger.info(f"Stopped bot process {process_id}")
+        for index, entry in enumerate(_processes_list):
+            if entry is not None and entry[1] is process:
+                _processes_list[index] = None
+                break
+        
+        # Compact once stopped slots outnumber live ones
+        if len(_processes_list) > 2 * len(bot_processes):
+            _processes_list[:] = [entry for entry in _processes_list if entry is not None]
+        return process
+
+async def stop_bot_process(process_id: str) -> bool:
+    """Stop a specific bot process"""
+    try:
+        process = _release_process_slot(process_id)
+        if process is None:
+            return False
+        
+        await _stop_process(process_id, process, timeout=10)
+        logger.info("Stopped bot process %s", process_id)
         return True
         
     except Exception as e:
-        logger.error(f"Error stopping bot process {process_id}: {e}")
+        logger.error("Error stopping bot process %s: %s", process_id, e)
         return False
 
 # Test framework instance
@@ -399,9 +515,9 @@ test_framework = TestFramework()
 
 # Test API endpoints
 @app.get("/test")
-async def test_dashboard():
+async def test_dashboard(request: Request):
     """Serve the test dashboard"""
-    return FileResponse("templates/test_dashboard.html")
+    return _page_response(request, "test_dashboard.html", "Test dashboard not found")
 
 @app.websocket("/ws/test")
 async def test_websocket(websocket: WebSocket):
@@ -410,21 +526,17 @@ async def test_websocket(websocket: WebSocket):
     
     try:
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
+            message = await _receive_json(websocket)
             
             if message.get("type") == "stop_tests":
                 # Handle test stop request
-                await websocket.send_text(json.dumps({
-                    "type": "test_stopped",
-                    "message": "Tests stopped by user request"
-                }))
+                await websocket.send_text(_WS_TESTS_STOPPED)
                 break
                 
     except WebSocketDisconnect:
         pass
     except Exception as e:
-        logger.error(f"Test WebSocket error: {e}")
+        logger.error("Test WebSocket error: %s", e)
 
 @app.post("/api/test/run-all")
 async def run_all_tests():
@@ -433,7 +545,7 @@ async def run_all_tests():
         results = await test_framework.run_all_tests()
         return JSONResponse(results)
     except Exception as e:
-        logger.error(f"Error running all tests: {e}")
+        logger.error("Error running all tests: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/test/run-priority/{priority}")
@@ -443,7 +555,7 @@ async def run_priority_tests(priority: int):
         results = await test_framework.run_priority_tests(priority)
         return JSONResponse(results)
     except Exception as e:
-        logger.error(f"Error running priority {priority} tests: {e}")
+        logger.error("Error running priority %s tests: %s", priority, e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/test/run-integration")
@@ -453,7 +565,7 @@ async def run_integration_tests():
         results = await test_framework.run_integration_tests()
         return JSONResponse(results)
     except Exception as e:
-        logger.error(f"Error running integration tests: {e}")
+        logger.error("Error running integration tests: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/test/status")
@@ -463,7 +575,7 @@ async def get_test_status():
         status = test_framework.get_test_status()
         return JSONResponse(status)
     except Exception as e:
-        logger.error(f"Error getting test status: {e}")
+        logger.error("Error getting test status: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/test/results")
@@ -473,7 +585,7 @@ async def get_test_results():
         results = test_framework.get_latest_results()
         return JSONResponse(results)
     except Exception as e:
-        logger.error(f"Error getting test results: {e}")
+        logger.error("Error getting test results: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 # Global shutdown flag
@@ -488,25 +600,41 @@ def signal_handler(signum, frame):
         sys.exit(1)
     
     shutdown_requested = True
-    logger.info(f"Received signal {signum}, shutting down gracefully...")
+    logger.info("Received signal %s, shutting down gracefully...", signum)
     
-    # Stop all bot processes
-    for process_id, process in list(bot_processes.items()):
-        try:
-            if process.poll() is None:
-                logger.info(f"Terminating bot process {process_id}")
-                process.terminate()
-                try:
-                    process.wait(timeout=2)
-                except subprocess.TimeoutExpired:
-                    logger.warning(f"Force killing bot process {process_id}")
-                    process.kill()
-                    process.wait()
-        except Exception as e:
-            logger.error(f"Error stopping bot process {process_id}: {e}")
+    # Signal every bot process group at once, then reap them against one shared deadline.
+    # The list is walked without the lock: the handler may have interrupted a holder on this thread,
+    # and appends and slot stores are atomic, so the walk sees each entry whole or not at all.
+    running = {}
+    for index in range(len(_processes_list)):
+        entry = _processes_list[index] if index < len(_processes_list) else None
+        if entry is None:
+            continue
+        process_id, process = entry
+        if process.returncode is None:
+            logger.info("Terminating bot process %s", process_id)
+            _signal_process_group(process)
+            running[process.pid] = (process_id, process)
     
-    # Clear the processes dict
+    deadline = time.monotonic() + 5
+    while running and time.monotonic() < deadline:
+        for pid in list(running):
+            try:
+                exited_pid, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                exited_pid = pid  # Already reaped by the event loop's child watcher
+            if exited_pid:
+                del running[pid]
+        if running:
+            time.sleep(0.05)
+    
+    for process_id, process in running.values():
+        logger.warning("Force killing bot process %s", process_id)
+        _signal_process_group(process, force=True)
+    
+    # Clear the registry
     bot_processes.clear()
+    _processes_list.clear()
     
     # Stop in-process bot synchronously
     if bot_process_instance:
@@ -515,14 +643,14 @@ def signal_handler(signum, frame):
             bot_process_instance.running = False
             if bot_process_instance.bot:
                 try:
-                    loop = asyncio.new_event_loop()
+                    loop = asyncio.new_event_loop()  # uvloop when installed in __main__
                     asyncio.set_event_loop(loop)
                     loop.run_until_complete(bot_process_instance.bot.close())
                     loop.close()
                 except Exception:
                     pass
         except Exception as e:
-            logger.error(f"Error stopping bot instance: {e}")
+            logger.error("Error stopping bot instance: %s", e)
     
     logger.info("Shutdown complete")
     sys.exit(0)
@@ -530,6 +658,18 @@ def signal_handler(signum, frame):
 if __name__ == "__main__":
     import argparse
     
+    # Use uvloop's faster event loop when it is available, for the server and the forced-shutdown path alike
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
+    # Records never use thread or process details, so skip collecting them for every LogRecord
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    
     # Setup signal handlers
     signal.signal(signal.SIGINT, signal_handler)
     signal.signal(signal.SIGTERM, signal_handler)
@@ -542,7 +682,7 @@ if __name__ == "__main__":
     
     args = parser.parse_args()
     
-    logger.info(f"Starting web server on {args.host}:{args.port}")
+    logger.info("Starting web server on %s:%s", args.host, args.port)
     
     try:
         uvicorn.run(
@@ -550,11 +690,16 @@ if __name__ == "__main__":
             host=args.host,
             port=args.port,
             reload=args.reload,
-            log_level=args.log_level
+            log_level=args.log_level,
+            # "auto" picks uvloop and httptools when installed (uvicorn[standard]) and falls back otherwise
+            loop="auto",
+            http="auto",
+            ws="websockets",
+            ws_max_size=_WS_MAX_SIZE
         )
     except KeyboardInterrupt:
         logger.info("Server shutdown requested")
     except Exception as e:
-        logger.error(f"Server error: {e}")
+        logger.error("Server error: %s", e)
     finally:
         logger.info("Server stopped")
\ No newline at end of file
@@ -1,13 +1,20 @@
 import asyncio
+import heapq
 import uuid
 import time
-from typing import Dict, Any, Optional, Set
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-import json
+import orjson
 from json_manager import JSONManager
 from logger import get_logger
 
+# Outbound messages buffered per session before new ones are dropped
+_OUTBOX_MAXSIZE = 256
+
+# Idle time after which a session expires
+_SESSION_TIMEOUT_HOURS = 24
+
 @dataclass
 class Session:
     session_id: str
@@ -19,6 +26,8 @@ class Session:
     websocket_connections: Set[Any] = field(default_factory=set)
     is_authenticated: bool = False
     discord_ready: bool = False
+    outbox: Optional[asyncio.Queue] = field(default=None, repr=False)
+    writer_task: Optional[asyncio.Task] = field(default=None, repr=False)
     
     def to_dict(self) -> dict:
         """Convert session to dictionary for JSON storage"""
@@ -66,20 +75,48 @@ class Session:
         """Remove WebSocket connection from session"""
         self.websocket_connections.discard(websocket)
     
-    async def broadcast_to_websockets(self, message: dict):
-        """Send message to all WebSocket connections in this session"""
+    async def broadcast_to_websockets(self, message: Union[dict, str]):
+        """Send message to all WebSocket connections in this session, str messages are already serialized JSON"""
         if not self.websocket_connections:
             return
         
+        # Serialize once for every connection
+        payload = message if type(message) is str else orjson.dumps(message).decode('utf-8')
+        
         # Create a copy to avoid modification during iteration
         connections = self.websocket_connections.copy()
         
         for websocket in connections:
             try:
-                await websocket.send_text(json.dumps(message))
+                await websocket.send_text(payload)
             except Exception:
                 # Remove dead connections
                 self.websocket_connections.discard(websocket)
+    
+    def enqueue_message(self, message: Union[dict, str]) -> bool:
+        """Queue a message for the background writer, returns False if the queue is full"""
+        if self.outbox is None:
+            self.outbox = asyncio.Queue(maxsize=_OUTBOX_MAXSIZE)
+            self.writer_task = asyncio.create_task(self._writer())
+        
+        try:
+            self.outbox.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+    
+    async def _writer(self):
+        """Drain the outbound queue to the WebSocket connections, in the order messages were queued"""
+        while True:
+            message = await self.outbox.get()
+            await self.broadcast_to_websockets(message)
+    
+    def stop_writer(self):
+        """Cancel the background writer task"""
+        if self.writer_task:
+            self.writer_task.cancel()
+            self.writer_task = None
+        self.outbox = None
 
 class SessionManager:
     def __init__(self):
@@ -88,28 +125,74 @@ class SessionManager:
         self.logger = get_logger()
         self.cleanup_task = None
         
+        # (expiry timestamp, session_id), entries are checked against the session when popped
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._expiry_wakeup = asyncio.Event()
+        self._expiry_scheduler_running = False
+        
         # Cleanup task will be started when needed
     
     def _start_cleanup_task(self):
         """Start the background cleanup task"""
         if self.cleanup_task is not None:
             return  # Task already running
-            
-        async def cleanup_loop():
-            while True:
-                try:
-                    await self.cleanup_expired_sessions()
-                    await asyncio.sleep(300)  # Clean up every 5 minutes
-                except Exception as e:
-                    self.logger.error(f"Error in cleanup task: {e}")
-                    await asyncio.sleep(60)  # Retry after 1 minute on error
         
         try:
-            self.cleanup_task = asyncio.create_task(cleanup_loop())
+            self.cleanup_task = asyncio.create_task(self.run_expiry_scheduler())
         except RuntimeError:
             # No event loop running, task will be started later
             pass
     
+    def _schedule_expiry(self, session: Session):
+        """Queue a session's expiry time, waking the scheduler if it is now the earliest"""
+        expires_at = session.last_activity.timestamp() + _SESSION_TIMEOUT_HOURS * 3600
+        heapq.heappush(self._expiry_heap, (expires_at, session.session_id))
+        if self._expiry_heap[0][1] == session.session_id:
+            self._expiry_wakeup.set()
+    
+    async def run_expiry_scheduler(self):
+        """Destroy sessions as they expire, sleeping until the earliest expiry
+        
+        Activity only moves a session's expiry later, so a popped entry whose
+        session is still active is pushed back with its current expiry instead
+        of being kept up to date on every update_activity.
+        """
+        if self._expiry_scheduler_running:
+            return  # Another task already runs the scheduler
+        self._expiry_scheduler_running = True
+        
+        try:
+            heap = self._expiry_heap
+            while True:
+                self._expiry_wakeup.clear()
+                if not heap:
+                    await self._expiry_wakeup.wait()
+                    continue
+                
+                delay = heap[0][0] - time.time()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._expiry_wakeup.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                _, session_id = heapq.heappop(heap)
+                session = self.sessions.get(session_id)
+                if session is None:
+                    continue  # Already destroyed
+                
+                try:
+                    if session.is_expired(_SESSION_TIMEOUT_HOURS):
+                        await self.destroy_session(session_id)
+                        self.logger.info(f"Expired session: {session_id}")
+                    else:
+                        self._schedule_expiry(session)
+                except Exception as e:
+                    self.logger.error(f"Error expiring session {session_id}: {e}")
+        finally:
+            self._expiry_scheduler_running = False
+    
     async def create_session(self, user_id: Optional[str] = None, expires_in: int = 3600) -> str:
         """Create a new session"""
         # Start cleanup task if not already running
@@ -127,6 +210,7 @@ class SessionManager:
         )
         
         self.sessions[session_id] = session
+        self._schedule_expiry(session)
         await self._save_session(session)
         
         self.logger.info(f"Created new session: {session_id}")
@@ -145,6 +229,7 @@ class SessionManager:
         if session and not session.is_expired():
             self.sessions[session_id] = session
             session.update_activity()
+            self._schedule_expiry(session)
             await self._save_session(session)
             return session
         
@@ -226,13 +311,28 @@ class SessionManager:
         if not session:
             return False
         
-        await session.broadcast_to_websockets(message)
+        # Same queue as replies, so a client sees events and replies in the order they were produced
+        if not session.enqueue_message(message):
+            self.logger.warning(f"Outbound queue full for session {session_id}, dropping message")
+            return False
+        return True
+    
+    def send_to_session(self, session_id: str, message: Union[dict, str]) -> bool:
+        """Queue a reply for the WebSocket connections of a session without waiting on them"""
+        session = self.sessions.get(session_id)
+        if not session:
+            return False
+        
+        if not session.enqueue_message(message):
+            self.logger.warning(f"Outbound queue full for session {session_id}, dropping message")
+            return False
         return True
     
     async def destroy_session(self, session_id: str) -> bool:
         """Destroy a session"""
         if session_id in self.sessions:
             session = self.sessions[session_id]
+            session.stop_writer()
             
             # Close all WebSocket connections
             for websocket in session.websocket_connections.copy():
@@ -288,6 +388,7 @@ class SessionManager:
                 session = Session.from_dict(session_data)
                 if not session.is_expired():
                     self.sessions[session_id] = session
+                    self._schedule_expiry(session)
                     return session
         
         return None
@@ -329,6 +430,7 @@ class SessionManager:
         
         # Save all active sessions
         for session in self.sessions.values():
+            session.stop_writer()
             await self._save_session(session)
         
         self.logger.info("Session manager shutdown complete")
@@ -4,7 +4,7 @@ import struct
 import threading
 import time
 import mmap
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 from dataclasses import dataclass
 from enum import Enum
 import os
@@ -41,6 +41,9 @@ class SharedMemoryManager:
         self.logger = CustomLogger()
         self.lock = threading.Lock()
         
+        # Called after every written message, so readers can wait instead of polling
+        self._subscribers: list[Callable[[], None]] = []
+        
         # Create temporary file for shared memory
         self.temp_file = tempfile.NamedTemporaryFile(delete=False)
         self.temp_file.write(b'\x00' * memory_size)
@@ -122,9 +125,17 @@ class SharedMemoryManager:
                 new_write_index = write_index + needed_space
                 new_message_count = min(message_count + 1, self.max_messages)
                 self._update_header(new_message_count, read_index, new_write_index)
-                
-                self.logger.debug(f"Sent message: {message_type.value} from {sender}")
-                return True
+                subscribers = list(self._subscribers)
+            
+            # Notify outside the lock, dropping subscribers whose event loop has closed
+            for callback in subscribers:
+                try:
+                    callback()
+                except RuntimeError:
+                    self.unsubscribe(callback)
+            
+            self.logger.debug(f"Sent message: {message_type.value} from {sender}")
+            return True
                 
         except Exception as e:
             self.logger.error(f"Error sending message: {e}")
@@ -190,6 +201,27 @@ class SharedMemoryManager:
         
         return messages
     
+    def subscribe(self, callback: Callable[[], None]):
+        """Register a callback run after every sent message
+        
+        Callbacks run on the sender's thread, so they must only hand off (e.g.
+        loop.call_soon_threadsafe) and never block. A callback raising
+        RuntimeError, as call_soon_threadsafe does once its loop is closed, is
+        unsubscribed.
+        """
+        with self.lock:
+            self._subscribers.append(callback)
+    
+    def unsubscribe(self, callback: Callable[[], None]):
+        """Remove a callback registered with subscribe"""
+        with self.lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+    
+    def drain(self) -> list[SharedMessage]:
+        """Receive every queued message in one call"""
+        return self.receive_messages(max_messages=self.max_messages)
+    
     def _compact_memory(self):
         """Compact memory by moving unread messages to the beginning"""
         try:
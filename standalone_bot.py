@@ -149,11 +149,13 @@ class StandaloneBot:
     async def set_token(self, token: str):
         """Set Discord token"""
         await self.config_manager.set_discord_token(token)
+        await self.config_manager.flush()
         self.logger.info("Token updated successfully")
         
     async def enable_auto_start(self, enabled: bool = True):
         """Enable or disable auto-start"""
         await self.config_manager.set_auto_start(enabled)
+        await self.config_manager.flush()
         self.logger.info(f"Auto-start {'enabled' if enabled else 'disabled'}")
         
     async def get_status(self) -> dict:
@@ -275,6 +275,7 @@ class TestFramework:
         """Test console output viewer"""
         test_name = "Console Viewer - Log Management"
         start_time = time.time()
+        cv = None
         
         try:
             cv = ConsoleViewer()
@@ -306,6 +307,10 @@ class TestFramework:
             self.test_results.append(TestResult(
                 test_name, TestStatus.FAILED, duration, str(e)
             ))
+        finally:
+            # The viewer subscribes to shared memory and starts a collector task, stop both
+            if cv is not None:
+                cv.close()
     
     async def _test_websocket_reconnection(self):
         """Test WebSocket reconnection logic"""
@@ -1,12 +1,16 @@
 import os
 import json
 import base64
+import re
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import getpass
 import aiofiles
 
+# Discord tokens are base64-like and typically 59-68 characters, accept 50-100
+_TOKEN_RE = re.compile(r'[A-Za-z0-9._-]{50,100}')
+
 class TokenManager:
     def __init__(self, storage_path="data/json/tokens.enc"):
         self.storage_path = storage_path
@@ -105,11 +109,4 @@ class TokenManager:
     
     def validate_token_format(self, token: str) -> bool:
         """Basic token format validation"""
-        # Discord tokens are typically 59-68 characters
-        if len(token) < 50 or len(token) > 100:
-            return False
-        
-        # Should contain base64-like characters
-        import re
-        pattern = r'^[A-Za-z0-9._-]+$'
-        return bool(re.match(pattern, token))
\ No newline at end of file
+        return _TOKEN_RE.fullmatch(token) is not None
\ No newline at end of file